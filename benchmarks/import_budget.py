@@ -0,0 +1,65 @@
+"""Check that the fetch path of the CLI starts fast and stays free of heavy libraries."""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What `renshuu fetch` imports before it makes its first request.
+FETCH_PATH_MODULES = ["scripts.renshuu", "scripts.fetch_data", "src.batch_fetcher"]
+
+# Libraries only the process/plot/serve subcommands may load.
+HEAVY_MODULES = ["polars", "pandas", "numpy", "pyarrow", "matplotlib", "seaborn", "calplot"]
+
+
+def measure_imports(modules: list) -> tuple:
+    """
+    Import `modules` in a fresh interpreter.
+    Returns (total import time in ms, heavy modules that got loaded).
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"for name in {modules!r}: __import__(name)\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of `renshuu fetch`.")
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Maximum median import time of the fetch path.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # The first run warms the bytecode cache.
+    measure_imports(FETCH_PATH_MODULES)
+    runs = [measure_imports(FETCH_PATH_MODULES) for _ in range(args.repeat)]
+    median_ms = statistics.median(elapsed for elapsed, _ in runs)
+    heavy = sorted({name for _, loaded in runs for name in loaded})
+
+    print(f"Fetch path imports: {median_ms:.1f} ms (budget {args.budget_ms:.0f} ms).")
+    failed = False
+    if heavy:
+        print(f"✗ Heavy libraries imported on the fetch path: {', '.join(heavy)}.")
+        failed = True
+    if median_ms > args.budget_ms:
+        print("✗ Fetch path import time is over budget.")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✓ Fetch path is within its import budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Benchmark the fetch, processing and plotting stages on synthetic data."""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import multiprocessing
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+def _rows(result) -> int:
+    if hasattr(result, "height"):
+        return result.height
+    if isinstance(result, tuple):
+        return sum(_rows(item) for item in result)
+    if isinstance(result, (list, dict)):
+        return len(result)
+    return 0
+
+
+# Each stage is (setup, run): setup prepares inputs untimed, run is timed.
+
+def _load_logs(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    return RenshuuDataProcessor.load_and_deduplicate_logs(ctx["log_file"], use_checkpoint=False)
+
+
+def stage_load_cold(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    return None, lambda _: RenshuuDataProcessor.load_and_deduplicate_logs(
+        ctx["log_file"], use_checkpoint=False
+    )
+
+
+def stage_load_checkpoint(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    RenshuuDataProcessor.load_and_deduplicate_logs(ctx["log_file"])
+    return None, lambda _: RenshuuDataProcessor.load_and_deduplicate_logs(ctx["log_file"])
+
+
+def stage_process_all(ctx):
+    from src.data_processor import load_and_process_data
+    return None, lambda _: load_and_process_data(ctx["log_file"])
+
+
+def stage_process_lazy_90d(ctx):
+    from datetime import date, timedelta
+    from src.data_processor import load_and_process_data_lazy
+    start = date.today() - timedelta(days=89)
+    return None, lambda _: load_and_process_data_lazy(ctx["log_file"], start_date=start)
+
+
+def stage_compact(ctx):
+    from src.log_store import RenshuuLogStore
+    return None, lambda _: RenshuuLogStore(ctx["log_file"]).compact()
+
+
+def stage_extract_daily(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    return _load_logs(ctx), RenshuuDataProcessor.extract_daily_activity_metrics
+
+
+def stage_extract_progress(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    return _load_logs(ctx), RenshuuDataProcessor.extract_level_progress_metrics
+
+
+def stage_extract_snapshot(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    return _load_logs(ctx), RenshuuDataProcessor.get_latest_progress_snapshot
+
+
+def _visualizer(ctx):
+    from src.visualizer import RenshuuVisualizer
+    return RenshuuVisualizer(output_dir=ctx["plots_dir"], headless=True)
+
+
+def stage_plot_heatmap(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    daily = RenshuuDataProcessor.extract_daily_activity_metrics(_load_logs(ctx))
+    viz = _visualizer(ctx)
+    return daily.select(["fetch_date", "daily_all"]), \
+        lambda df: viz.plot_activity_heatmap(df, "Overall Activity", "all")
+
+
+def stage_plot_progress(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    progress = RenshuuDataProcessor.extract_level_progress_metrics(_load_logs(ctx))
+    return progress, _visualizer(ctx).plot_progress_over_time_multi_panel
+
+
+def stage_plot_bars(ctx):
+    from src.data_processor import RenshuuDataProcessor
+    snapshots = RenshuuDataProcessor.get_latest_progress_snapshot(_load_logs(ctx))
+    return snapshots, _visualizer(ctx).plot_current_progress_bars
+
+
+def stage_fetch_sequential(ctx):
+    from stub_server import StubProfileServer
+    from src.data_fetcher import RenshuuDataFetcher
+    server = StubProfileServer(latency=ctx["latency"]).start()
+
+    def run(_):
+        for i in range(ctx["accounts"]):
+            fetcher = RenshuuDataFetcher(api_key=f"key{i}", base_url=server.base_url)
+            fetcher.save_to_log(fetcher.fetch_profile(), os.path.join(ctx["work_dir"], f"seq_{i}.jsonl"))
+    return None, run
+
+
+def stage_fetch_batch(ctx):
+    from stub_server import StubProfileServer
+    from src.batch_fetcher import RenshuuBatchFetcher
+    server = StubProfileServer(latency=ctx["latency"]).start()
+    accounts = [
+        {"name": f"learner_{i}", "api_key": f"key{i}",
+         "log_file": os.path.join(ctx["work_dir"], f"batch_{i}.jsonl")}
+        for i in range(ctx["accounts"])
+    ]
+    fetcher = RenshuuBatchFetcher(base_url=server.base_url, rate_limit=0)
+    return accounts, fetcher.fetch_all
+
+
+STAGES = {
+    "load_cold": stage_load_cold,
+    "load_checkpoint": stage_load_checkpoint,
+    "process_all": stage_process_all,
+    "process_lazy_90d": stage_process_lazy_90d,
+    "compact": stage_compact,
+    "extract_daily": stage_extract_daily,
+    "extract_progress": stage_extract_progress,
+    "extract_snapshot": stage_extract_snapshot,
+    "plot_heatmap": stage_plot_heatmap,
+    "plot_progress": stage_plot_progress,
+    "plot_bars": stage_plot_bars,
+    "fetch_sequential": stage_fetch_sequential,
+    "fetch_batch": stage_fetch_batch,
+}
+
+
+def _run_stage(name: str, ctx: dict) -> dict:
+    """
+    Run one stage in the current (fresh) process and measure it.
+    """
+    import contextlib
+    import io
+
+    from src.instrumentation import StageRecord, track_peak_rss
+
+    # Keep the modules' progress messages out of the report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        inputs, run = STAGES[name](ctx)
+        # Only the stage itself: imports and setup stay out of its peak.
+        with track_peak_rss(StageRecord(name)) as memory:
+            start = time.perf_counter()
+            result = run(inputs)
+            elapsed = time.perf_counter() - start
+
+    peak = memory.peak_rss_mb
+    return {
+        "stage": name, "seconds": elapsed, "rows": _rows(result),
+        "peak_rss_mb": float("nan") if peak is None else peak,
+        # What the stage added at its peak to what was resident before it.
+        "peak_growth_mb": float("nan") if peak is None else peak - memory.rss_start_mb,
+    }
+
+
+def run_benchmarks(stages: list, ctx: dict, repeat: int = 1) -> list:
+    """
+    Run each stage `repeat` times, each time in a new process so stages do
+    not share caches. Keeps the fastest run.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for name in stages:
+        runs = []
+        for _ in range(repeat):
+            # Each run starts from the raw log, without sidecar caches.
+            for entry in os.listdir(ctx["data_dir"]):
+                path = os.path.join(ctx["data_dir"], entry)
+                if path != ctx["log_file"]:
+                    shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+            with context.Pool(1) as pool:
+                runs.append(pool.apply(_run_stage, (name, ctx)))
+        results.append(min(runs, key=lambda r: r["seconds"]))
+        best = results[-1]
+        print(f"{name:<20} {best['seconds'] * 1000:>10.1f} ms {best['rows']:>10} rows "
+              f"{best['peak_rss_mb']:>9.1f} MB peak {best['peak_growth_mb']:>+9.1f} MB")
+    return results
+
+
+def compare(results: list, baseline_file: str) -> None:
+    """
+    Print the change against a previous results file.
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {r["stage"]: r for r in json.load(f)["results"]}
+
+    print(f"\nChange against {baseline_file}:")
+    for result in results:
+        before = baseline.get(result["stage"])
+        if before and before["seconds"]:
+            time_change = (result["seconds"] / before["seconds"] - 1) * 100
+            # Results from before peaks were measured per stage have no growth.
+            memory_change = result["peak_growth_mb"] - before.get("peak_growth_mb", float("nan"))
+            print(f"{result['stage']:<20} {time_change:>+8.1f}% time {memory_change:>+9.1f} MB peak growth")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Renshuu tracker stages.")
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--fetches-per-day", type=int, default=4)
+    parser.add_argument("--accounts", type=int, default=8,
+                        help="Accounts fetched in the fetch stages.")
+    parser.add_argument("--corrupted-lines", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="Simulated /profile latency in seconds.")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against a previous results JSON file.")
+    args = parser.parse_args()
+
+    from synthetic_logs import generate_log
+
+    work_dir = tempfile.mkdtemp(prefix="renshuu_bench_")
+    try:
+        data_dir = os.path.join(work_dir, "data")
+        ctx = {
+            "work_dir": work_dir,
+            "data_dir": data_dir,
+            "log_file": os.path.join(data_dir, "renshuu_logs.jsonl"),
+            "plots_dir": os.path.join(work_dir, "plots"),
+            "accounts": args.accounts,
+            "latency": args.latency,
+        }
+        n_lines = generate_log(ctx["log_file"], years=args.years,
+                               fetches_per_day=args.fetches_per_day,
+                               corrupted_lines=args.corrupted_lines)
+        size_mb = os.path.getsize(ctx["log_file"]) / 1024 ** 2
+        print(f"Synthetic log: {n_lines} lines, {size_mb:.1f} MB.\n")
+
+        results = run_benchmarks(args.stages, ctx, repeat=args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Check that a category or level first seen late in a log reaches the progress data."""
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import argparse
+import contextlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from synthetic_logs import generate_log, DRIFT_CATEGORY, DRIFT_LEVEL
+from src.data_processor import load_and_process_data, load_and_process_data_lazy
+
+
+def check(name: str, loader, log_file: str) -> tuple:
+    """
+    Load `log_file` with `loader` and check the drifted pairs made it through.
+    Returns (whether every check passed, number of progress rows).
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        _, df_progress, _ = loader(log_file)
+
+    pairs = set(zip(df_progress["category"].cast(str), df_progress["level"].cast(str)))
+    checks = {
+        "new category in the long frame": (DRIFT_CATEGORY, 'n5') in pairs,
+        "new level in the long frame": ('vocab', DRIFT_LEVEL) in pairs,
+        "new category in the Enum": DRIFT_CATEGORY in df_progress.schema["category"].categories,
+        "new level in the Enum": DRIFT_LEVEL in df_progress.schema["level"].categories,
+        "drift warning printed": DRIFT_CATEGORY in output.getvalue() and DRIFT_LEVEL in output.getvalue(),
+    }
+    for label, passed in checks.items():
+        print(f"{'✓' if passed else '✗'} {name}: {label}.")
+    return all(checks.values()), df_progress.height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check schema inference on a log whose progress schema drifts.")
+    parser.add_argument("--years", type=float, default=0.5)
+    parser.add_argument("--drift-after", type=int, default=150,
+                        help="Line from which progress reports a new category and level.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="renshuu_drift_")
+    try:
+        # Separate logs, so the eager loader's sidecars do not feed the lazy one.
+        results = []
+        for name, loader in [("eager", load_and_process_data), ("lazy", load_and_process_data_lazy)]:
+            log_file = os.path.join(work_dir, name, "renshuu_data.jsonl")
+            generate_log(log_file, years=args.years, drift_after=args.drift_after)
+            results.append(check(name, loader, log_file))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    (eager_ok, eager_rows), (lazy_ok, lazy_rows) = results
+    rows_match = eager_rows == lazy_rows
+    print(f"{'✓' if rows_match else '✗'} Progress rows: eager {eager_rows}, lazy {lazy_rows}.")
+
+    if not (eager_ok and lazy_ok and rows_match):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
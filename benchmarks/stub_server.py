@@ -0,0 +1,103 @@
+"""Local stand-in for the Renshuu /profile endpoint."""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from synthetic_logs import make_profile, CATEGORIES, LEVELS
+
+
+class StubProfileServer:
+    """
+    Serves synthetic /profile responses with configurable latency and
+    error rate, so fetchers can be benchmarked without the real API.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.1, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.progress = {category: {level: 0 for level in LEVELS} for category in CATEGORIES}
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        with self.lock:
+            self.requests += 1
+            failed = self.rnd.random() < self.error_rate
+            profile = make_profile(self.rnd, self.progress, 0)
+
+        time.sleep(self.latency)
+
+        if handler.path.split("?")[0] != "/profile":
+            status, body = 404, {"error": "Not found"}
+        elif not handler.headers.get("Authorization", "").startswith("Bearer "):
+            status, body = 401, {"error": "Missing API key"}
+        elif failed:
+            status, body = 503, {"error": "Service unavailable"}
+        else:
+            status, body = 200, profile
+
+        payload = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def start(self) -> "StubProfileServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Renshuu /profile stub.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubProfileServer(port=args.port, latency=args.latency, error_rate=args.error_rate)
+    print(f"Serving /profile on {server.base_url} (Ctrl+C to stop).")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Generate synthetic Renshuu logs matching the /profile schema."""
+
+import os
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+CATEGORIES = ['vocab', 'grammar', 'kanji', 'sent']
+LEVELS = ['n5', 'n4', 'n3', 'n2', 'n1']
+
+# Category and level the settings do not know, added when a log drifts.
+DRIFT_CATEGORY = 'reading'
+DRIFT_LEVEL = 'n0'
+
+
+def make_profile(rnd: random.Random, progress: Dict[str, Dict[str, int]],
+                 fetch_index: int) -> Dict[str, Any]:
+    """
+    Build one /profile response, advancing `progress` in place.
+    """
+    for category in progress:
+        for level in progress[category]:
+            if rnd.random() < 0.3:
+                progress[category][level] = min(100, progress[category][level] + 1)
+
+    # Counters grow during the day, so later fetches report more.
+    studied = {f"today_{category}": rnd.randint(0, 40) * (fetch_index + 1) for category in CATEGORIES}
+    studied["today_all"] = sum(studied.values())
+
+    return {
+        "id": "123456",
+        "real_name": "Benchmark Learner",
+        "adventure_level": str(rnd.randint(1, 50)),
+        "user_length": "1000 days",
+        "kao": "https://www.renshuu.org/img/kao.png",
+        "studied": studied,
+        "level_progress_percs": {category: dict(levels) for category, levels in progress.items()},
+        "streaks": {
+            category: {"correct_in_a_row": rnd.randint(0, 50), "correct_in_a_row_alltime": 100}
+            for category in CATEGORIES
+        },
+    }
+
+
+def generate_log(log_file: str, years: float = 1.0, fetches_per_day: int = 1,
+                 corrupted_lines: int = 0, seed: int = 0,
+                 end: datetime = None, drift_after: int = None) -> int:
+    """
+    Write a JSONL log covering `years` of history ending at `end` (default: today).
+    `corrupted_lines` truncated lines are scattered through the file. From
+    line `drift_after` on, progress also reports a new category and level.
+    Returns the number of lines written.
+    """
+    rnd = random.Random(seed)
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    n_days = int(years * 365)
+    start = end - timedelta(days=n_days - 1)
+
+    n_lines = n_days * fetches_per_day
+    corrupted = set(rnd.sample(range(n_lines), min(corrupted_lines, n_lines)))
+    progress = {category: {level: 0 for level in LEVELS} for category in CATEGORIES}
+
+    os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+    with open(log_file, 'w', encoding='utf-8') as f:
+        line_number = 0
+        for day in range(n_days):
+            for fetch_index in range(fetches_per_day):
+                if line_number == drift_after:
+                    progress[DRIFT_CATEGORY] = {level: 0 for level in LEVELS}
+                    progress['vocab'][DRIFT_LEVEL] = 0
+                profile = make_profile(rnd, progress, fetch_index)
+                timestamp = start + timedelta(
+                    days=day,
+                    seconds=int((fetch_index + rnd.random()) * 86400 / fetches_per_day),
+                    microseconds=rnd.randint(1, 999999)
+                )
+                profile["fetch_timestamp"] = timestamp.isoformat()
+                line = json.dumps(profile, ensure_ascii=False)
+
+                if line_number in corrupted:
+                    # Mimic a write killed halfway through.
+                    line = line[:rnd.randint(1, len(line) - 1)]
+                f.write(line + '\n')
+                line_number += 1
+
+    return n_lines
+
+
+def generate_accounts(output_dir: str, accounts: int = 1, seed: int = 0, **kwargs) -> list:
+    """
+    Write one log per account into `output_dir`. Returns the log paths.
+    """
+    paths = []
+    for i in range(accounts):
+        path = os.path.join(output_dir, f"learner_{i:03d}.jsonl")
+        generate_log(path, seed=seed + i, **kwargs)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Renshuu logs.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--fetches-per-day", type=int, default=1)
+    parser.add_argument("--accounts", type=int, default=1)
+    parser.add_argument("--corrupted-lines", type=int, default=0)
+    parser.add_argument("--drift-after", type=int, default=None,
+                        help="Line from which progress reports a new category and level.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_accounts(
+        args.output_dir, accounts=args.accounts, years=args.years,
+        fetches_per_day=args.fetches_per_day, corrupted_lines=args.corrupted_lines,
+        drift_after=args.drift_after, seed=args.seed
+    )
+    print(f"Wrote {len(paths)} logs to {args.output_dir}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,71 @@ load_dotenv(dotenv_path="config/.env")
 REN_API_KEY = os.getenv("REN_API_KEY")
 API_BASE_URL = os.getenv("API_BASE_URL")
 
+# HTTP settings 
+REQUEST_TIMEOUT = 10          # seconds per request
+MAX_RETRIES = 3               # retries on 429/5xx and connection errors
+RETRY_BACKOFF = 1.0           # base delay in seconds, doubled on each retry
+FETCH_MAX_WORKERS = 8         # concurrent requests in batch mode
+FETCH_RATE_LIMIT = 5.0        # maximum requests per second across all workers
+
+# Repeated profiles: 'off' logs every fetch in full, 'skip' drops unchanged fetches
+# within a day, 'marker' logs them as a small marker, and 'delta' additionally logs
+# changed fetches as the fields that differ from the last full record.
+FETCH_DEDUP_MODE = 'off'
+FETCH_DELTA_MAX_RATIO = 0.5   # write a new full record once a delta exceeds this share of it
+
+# Log rotation: close the active log into a compressed segment every 'month', or
+# once it reaches SEGMENT_MAX_BYTES ('size'). None keeps a single growing file.
+LOG_ROTATION = None
+SEGMENT_MAX_BYTES = 64 * 1024 ** 2
+SEGMENT_COMPRESSION = 'gzip'  # or 'zstd' (needs the zstandard package)
+SEGMENT_READ_WORKERS = 4      # segments decompressed in parallel when loading
+
+# Appends hold an advisory lock ('<log>.lock') and go out as one write, fsynced
+# unless LOG_FSYNC is off. With group commit (fetch_data.py --group-commit),
+# concurrent fetchers share one write per LOG_GROUP_COMMIT_RECORDS records or
+# per LOG_GROUP_COMMIT_DELAY seconds, whichever comes first.
+LOG_FSYNC = True
+LOG_GROUP_COMMIT_RECORDS = 32
+LOG_GROUP_COMMIT_DELAY = 0.05
+
+# Loading parses the log in chunks of about this many bytes; malformed lines are
+# moved aside to '<log>.quarantine.jsonl' instead of failing the whole load.
+INGEST_CHUNK_BYTES = 8 * 1024 ** 2
+
 # File paths 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 PLOTS_DIR = os.path.join(PROJECT_ROOT, "plots")
 LOG_FILE = os.path.join(DATA_DIR, "renshuu_logs.jsonl")
+ACCOUNTS_FILE = os.path.join(PROJECT_ROOT, "config", "accounts.json")
+COHORT_DAILY_FILE = os.path.join(DATA_DIR, "cohort_daily.parquet")
+SCHEDULER_STATUS_FILE = os.path.join(DATA_DIR, "scheduler_status.json")
+
+# Cohort batch processing: worker processes (None: one per core) and the resident
+# memory (MB) above which a worker is killed; its accounts are then retried.
+BATCH_MAX_WORKERS = None
+BATCH_MEMORY_LIMIT_MB = 2048
+
+# Resident scheduler (renshuu.py schedule): seconds between fetches of an account
+# (overridden per account by an "interval" entry in accounts.json), random delay
+# added to each, and backoff after failed fetches (doubling up to the maximum).
+# Its health and per-account state go to SCHEDULER_STATUS_FILE.
+SCHEDULER_INTERVAL = 24 * 3600
+SCHEDULER_JITTER = 300
+SCHEDULER_ERROR_BACKOFF = 60
+SCHEDULER_MAX_BACKOFF = 3600
+SCHEDULER_HEARTBEAT = 60      # status file refreshed at least this often, in seconds
+
+# Instrumentation: per-stage timings written as JSONL (and optionally a Prometheus textfile).
+METRICS_ENABLED = os.getenv("RENSHUU_METRICS", "0") == "1"
+METRICS_FILE = os.getenv("RENSHUU_METRICS_FILE", os.path.join(DATA_DIR, "metrics.jsonl"))
+METRICS_PROM_FILE = os.getenv("RENSHUU_METRICS_PROM")
+
+# Local read-only query server.
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8050
+SERVER_RESPONSE_CACHE = 128   # encoded responses kept per log version (least recently used evicted)
 
 # Study categories and levels 
 CATEGORIES = {
@@ -38,3 +98,25 @@ PLOT_STYLE = {
     'figsize': (12, 8)
 }
 
+# Render profiles, chosen per run with generate_plots.py --profile (default:
+# RENDER_PROFILE). Each sets the output format ('png', 'svg' or 'pdf') and dpi;
+# whether to fit the layout ('layout', on unless False) and crop to the drawn
+# area ('tight'), each an extra pass over the figure's text; whether dense
+# layers are embedded as images in vector output ('rasterize'); and whether
+# saved PNGs are recompressed with Pillow ('optimize'), optionally reduced to a
+# palette of 'colors' colours.
+RENDER_PROFILES = {
+    'preview': {'format': 'png', 'dpi': 72, 'layout': False, 'tight': False},
+    'standard': {'format': 'png', 'dpi': 150, 'tight': True, 'optimize': True, 'colors': 256},
+    'publication': {'format': 'png', 'dpi': PLOT_STYLE['dpi'], 'tight': True},
+    'svg': {'format': 'svg', 'dpi': 150, 'tight': True, 'rasterize': True},
+    'pdf': {'format': 'pdf', 'dpi': PLOT_STYLE['dpi'], 'tight': True, 'rasterize': True},
+}
+RENDER_PROFILE = 'publication'
+
+# Calendar heatmap renderer: 'calplot', or 'native' for the built-in NumPy renderer.
+HEATMAP_RENDERER = 'calplot'
+
+# Progress lines longer than this are downsampled ('lttb' or 'minmax'); None disables it.
+PROGRESS_MAX_POINTS = 500
+PROGRESS_DOWNSAMPLING = 'lttb'
@@ -0,0 +1,21 @@
+import sys 
+import os 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.log_store import RenshuuLogStore
+from config.settings import LOG_FILE 
+
+def main():
+    """
+    Compact the JSONL log into the columnar Parquet store.
+    """
+    log_file = sys.argv[1] if len(sys.argv) > 1 else LOG_FILE
+
+    if RenshuuLogStore(log_file).compact():
+        print("✓ Successfully compacted Renshuu log!")
+    else:
+        print("✗ Failed to compact log.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
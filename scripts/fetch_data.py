@@ -1,25 +1,74 @@
-import sys 
-import os 
+import sys
+import os
+import time
+import argparse
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.data_fetcher import RenshuuDataFetcher
+from src.log_records import DEDUP_MODES
 
-def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch and log Renshuu data.")
+    parser.add_argument("--accounts", nargs="?", const="", default=None, metavar="FILE",
+                        help="Fetch every account listed in FILE (default: config/accounts.json).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of concurrent requests in batch mode.")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Maximum requests per second in batch mode.")
+    parser.add_argument("--dedup-mode", choices=DEDUP_MODES, default=None,
+                        help="How to log profiles unchanged since the last fetch "
+                             "(default: FETCH_DEDUP_MODE in config/settings.py).")
+    parser.add_argument("--group-commit", action="store_true",
+                        help="In batch mode, batch the appends of accounts sharing a log file.")
+    return parser.parse_args()
+
+def fetch_batch(args) -> bool:
+    """
+    Fetch and log all configured accounts concurrently.
+    """
+    from src.batch_fetcher import RenshuuBatchFetcher, load_accounts
+
+    accounts = load_accounts(args.accounts or None)
+    fetcher = RenshuuBatchFetcher(max_workers=args.workers, rate_limit=args.rate_limit,
+                                  dedup_mode=args.dedup_mode, group_commit=args.group_commit)
+
+    start = time.perf_counter()
+    results = fetcher.fetch_all(accounts)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = "✓" if result["success"] else "✗"
+        line = f"{status} {result['name']}: {result['elapsed']:.2f}s"
+        if result["error"]:
+            line += f" ({result['error']})"
+        print(line)
+
+    n_ok = sum(result["success"] for result in results)
+    print(f"Fetched {n_ok}/{len(results)} accounts in {elapsed:.2f}s.")
+    return n_ok == len(results)
+
+def run(args):
     """
     Fetch and log Renshuu data.
     """
     try:
-        fetcher = RenshuuDataFetcher()
-        success = fetcher.fetch_and_log()
+        if args.accounts is not None:
+            success = fetch_batch(args)
+        else:
+            fetcher = RenshuuDataFetcher(dedup_mode=args.dedup_mode)
+            success = fetcher.fetch_and_log()
 
         if success:
             print("✓ Successfully fetched and logged Renshuu data!")
         else:
             print("✗ Failed to fetch or log data.")
 
-    except Exception as e: 
+    except Exception as e:
         print(f"✗ Error: {e}")
         sys.exit(1)
 
+def main():
+    run(parse_args())
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
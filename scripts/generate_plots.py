@@ -2,66 +2,90 @@
 
 import sys 
 import os 
+import argparse
 import polars as pl 
-import pandas as pd 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.data_processor import load_and_process_data
-from src.visualizer import RenshuuVisualizer
-from config.settings import LOG_FILE 
+from datetime import date, timedelta
+from concurrent.futures import as_completed
+from src.data_processor import load_and_process_data, load_and_process_data_lazy, load_latest_snapshot
+from src.process_pool import spawn_pool
+from src.visualizer import RenshuuVisualizer, build_render_tasks
+from config.settings import LOG_FILE, RENDER_PROFILES, RENDER_PROFILE
 
 
-def _ensure_pandas(df) -> pd.DataFrame:
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate Renshuu visualisations.")
+    parser.add_argument("--days", type=int, default=None,
+                        help="Only plot the last N days of history.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Number of worker processes rendering figures in parallel.")
+    parser.add_argument("--show", action="store_true",
+                        help="Render sequentially and display each figure interactively.")
+    parser.add_argument("--force", action="store_true",
+                        help="Redraw every figure even if its inputs are unchanged.")
+    parser.add_argument("--profile", choices=list(RENDER_PROFILES), default=RENDER_PROFILE,
+                        help="Render profile: output format, resolution and PNG optimisation.")
+    parser.add_argument("--snapshot-only", action="store_true",
+                        help="Only redraw the progress bars, from the fetcher's latest snapshot.")
+    return parser.parse_args()
+
+def _render_figure(method_name: str, use_cache: bool, profile: str, *args) -> str:
     """
-    Convert Polars DataFrame to Pandas.
+    Render a single figure headlessly (runs in a worker process).
     """
-    if isinstance(df, pl.DataFrame):
-        return df.to_pandas()
-    return df
+    viz = RenshuuVisualizer(headless=True, use_cache=use_cache, profile=profile)
+    getattr(viz, method_name)(*args)
+    return method_name
 
-def main():
+def render_tasks(tasks: list, jobs: int, show: bool = False, use_cache: bool = True,
+                 profile: str = None) -> None:
+    """
+    Render figures, in parallel across a process pool unless shown interactively.
+    Figures whose inputs are unchanged are skipped when `use_cache` is set.
+    """
+    if show or jobs <= 1:
+        viz = RenshuuVisualizer(headless=not show, use_cache=use_cache and not show, profile=profile)
+        for method_name, args in tasks:
+            getattr(viz, method_name)(*args)
+        return
+
+    with spawn_pool(min(jobs, len(tasks))) as executor:
+        futures = [executor.submit(_render_figure, method_name, use_cache, profile, *args) for method_name, args in tasks]
+        for future in as_completed(futures):
+            future.result()
+
+def run(args):
     """
     Generate all plots from logged data.
     """
     print("Loading and processing Renshuu data...")
 
     try: 
+        if args.snapshot_only:
+            snapshots = load_latest_snapshot(LOG_FILE)
+            if not snapshots or all(df.is_empty() for df in snapshots.values()):
+                print("No progress snapshot available. Run fetch_data.py first.")
+                sys.exit(1)
+            render_tasks([("plot_current_progress_bars", (snapshots,))], 1,
+                         show=args.show, use_cache=not args.force, profile=args.profile)
+            print("✓ Progress bars generated successfully!")
+            return
+
         # Load data.
-        df_daily, df_progress, snapshots = load_and_process_data(LOG_FILE)
+        if args.days:
+            start_date = date.today() - timedelta(days=args.days - 1)
+            df_daily, df_progress, snapshots = load_and_process_data_lazy(LOG_FILE, start_date=start_date)
+        else:
+            df_daily, df_progress, snapshots = load_and_process_data(LOG_FILE)
         
         if df_daily.is_empty() and df_progress.is_empty():
             print("No data available. Run fetch_data.py first.")
             sys.exit(1)
 
-        df_daily = _ensure_pandas(df_daily)
-        df_daily = df_daily.set_index("fetch_date")
-
-        df_progress = _ensure_pandas(df_progress)
-
-        snapshots = {cat: _ensure_pandas(df) for cat, df in snapshots.items()}
-
-        # Create visualizer.
-        viz = RenshuuVisualizer()
-
-        # Generate heatmaps. 
-        if not df_daily.empty:
-            print("Generating activity heatmaps...")
-            viz.plot_all_activity_heatmaps(df_daily)
-        else:
-            print("No daily activity data available.")
-
-        # Generate progress bars.
-        if snapshots and not all(df.empty for df in snapshots.values()):
-            print("Generating current progress bars...")
-            viz.plot_current_progress_bars(snapshots)
-        else:
-            print("No progress snapshot available.")
-             
-        if not df_progress.empty:
-            print("Generating progress time-evolution plots...")
-            viz.plot_progress_over_time_multi_panel(df_progress)
-        else:
-            print("No progress data available.")
+        tasks = build_render_tasks(df_daily, df_progress, snapshots)
+        print(f"Generating {len(tasks)} figures ({args.profile} profile)...")
+        render_tasks(tasks, args.jobs, show=args.show, use_cache=not args.force, profile=args.profile)
 
         print("✓ All visualisations generated successfully!")
 
@@ -69,5 +93,8 @@ def main():
         print(f"✗ Error generating plots: {e}.")
         sys.exit(1)
 
+def main():
+    run(parse_args())
+
 if __name__ == "__main__":
     main() 
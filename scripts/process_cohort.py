@@ -0,0 +1,64 @@
+"""Script to process and plot a whole cohort of per-account logs in parallel."""
+
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_processor import RenshuuBatchProcessor, discover_logs
+from config.settings import DATA_DIR, PLOTS_DIR, COHORT_DAILY_FILE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Process and plot every account log in a directory.")
+    parser.add_argument("--log-dir", default=DATA_DIR,
+                        help="Directory of per-account '<name>.jsonl' logs.")
+    parser.add_argument("--output-dir", default=PLOTS_DIR,
+                        help="Plots go to a '<name>/' subdirectory of this per account.")
+    parser.add_argument("--cohort-file", default=COHORT_DAILY_FILE,
+                        help="Parquet file combining every account's daily metrics.")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Number of worker processes (default: one per core).")
+    parser.add_argument("--memory-limit-mb", type=int, default=None,
+                        help="Resident memory above which a worker is killed and its "
+                             "accounts retried (0 for no limit).")
+    parser.add_argument("--force", action="store_true",
+                        help="Redraw every figure even if its inputs are unchanged.")
+    return parser.parse_args()
+
+def run(args):
+    """
+    Process and render all accounts, then write the cohort table.
+    """
+    accounts = discover_logs(args.log_dir)
+    if not accounts:
+        print(f"✗ No account logs found in '{args.log_dir}'.")
+        sys.exit(1)
+
+    processor = RenshuuBatchProcessor(output_dir=args.output_dir, max_workers=args.jobs,
+                                      memory_limit_mb=args.memory_limit_mb, use_cache=not args.force)
+    print(f"Processing {len(accounts)} accounts with {min(processor.max_workers, len(accounts))} workers...")
+
+    start = time.perf_counter()
+    results = processor.process_all(accounts)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = "✓" if result["success"] else "✗"
+        line = f"{status} {result['name']}: {result['days']} days, {result['figures']} figures, {result['elapsed']:.2f}s"
+        if result["error"]:
+            line += f" ({result['error']})"
+        print(line)
+
+    n_ok = sum(result["success"] for result in results)
+    print(f"Processed {n_ok}/{len(results)} accounts in {elapsed:.2f}s.")
+
+    if not processor.write_cohort(results, args.cohort_file) or n_ok != len(results):
+        sys.exit(1)
+
+def main():
+    run(parse_args())
+
+if __name__ == "__main__":
+    main()
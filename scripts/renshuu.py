@@ -0,0 +1,146 @@
+"""Unified Renshuu tracker CLI: fetch, process, plot, cohort, serve and schedule."""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Only light modules are imported here: each subcommand imports what it
+# needs when it runs, so `renshuu fetch` never loads Polars or Matplotlib.
+from src.log_records import DEDUP_MODES
+from config.settings import (
+    LOG_FILE, DATA_DIR, PLOTS_DIR, COHORT_DAILY_FILE, SERVER_HOST, SERVER_PORT, SCHEDULER_STATUS_FILE,
+    RENDER_PROFILES, RENDER_PROFILE
+)
+
+
+def cmd_fetch(args):
+    from scripts.fetch_data import run
+    run(args)
+
+def cmd_process(args):
+    """
+    Load and process the log, optionally compacting it and updating rollups.
+    """
+    from src.data_processor import load_and_process_data
+
+    if args.compact:
+        from src.log_store import RenshuuLogStore
+        if not RenshuuLogStore(args.log_file).compact():
+            sys.exit(1)
+
+    df_daily, df_progress, _ = load_and_process_data(args.log_file)
+    if df_daily.is_empty():
+        print("✗ No data available. Run `renshuu fetch` first.")
+        sys.exit(1)
+
+    first, last = df_daily["fetch_date"].min(), df_daily["fetch_date"].max()
+    print(f"✓ {len(df_daily)} days from {first:%Y-%m-%d} to {last:%Y-%m-%d}, "
+          f"{len(df_progress)} progress rows.")
+
+    if args.rollups:
+        from src.rollups import RenshuuRollups
+        if not RenshuuRollups(args.log_file).update(df_daily, df_progress):
+            sys.exit(1)
+
+def cmd_plot(args):
+    from scripts.generate_plots import run
+    run(args)
+
+def cmd_cohort(args):
+    from scripts.process_cohort import run
+    run(args)
+
+def cmd_serve(args):
+    from scripts.serve import run
+    run(args)
+
+def cmd_schedule(args):
+    from scripts.schedule import run
+    run(args)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="renshuu", description="Track and visualise Renshuu progress.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch = subparsers.add_parser("fetch", help="Fetch and log profiles.")
+    fetch.add_argument("--accounts", nargs="?", const="", default=None, metavar="FILE",
+                       help="Fetch every account listed in FILE (default: config/accounts.json).")
+    fetch.add_argument("--workers", type=int, default=None,
+                       help="Number of concurrent requests in batch mode.")
+    fetch.add_argument("--rate-limit", type=float, default=None,
+                       help="Maximum requests per second in batch mode.")
+    fetch.add_argument("--dedup-mode", choices=DEDUP_MODES, default=None,
+                       help="How to log profiles unchanged since the last fetch.")
+    fetch.add_argument("--group-commit", action="store_true",
+                       help="In batch mode, batch the appends of accounts sharing a log file.")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    process = subparsers.add_parser("process", help="Load and process the log.")
+    process.add_argument("--log-file", default=LOG_FILE)
+    process.add_argument("--compact", action="store_true",
+                         help="Compact the log into the Parquet store first.")
+    process.add_argument("--rollups", action="store_true",
+                         help="Update the weekly/monthly/streak rollups.")
+    process.set_defaults(handler=cmd_process)
+
+    plot = subparsers.add_parser("plot", help="Generate the visualisations.")
+    plot.add_argument("--days", type=int, default=None,
+                      help="Only plot the last N days of history.")
+    plot.add_argument("--jobs", type=int, default=os.cpu_count(),
+                      help="Number of worker processes rendering figures in parallel.")
+    plot.add_argument("--show", action="store_true",
+                      help="Render sequentially and display each figure interactively.")
+    plot.add_argument("--force", action="store_true",
+                      help="Redraw every figure even if its inputs are unchanged.")
+    plot.add_argument("--profile", choices=list(RENDER_PROFILES), default=RENDER_PROFILE,
+                      help="Render profile: output format, resolution and PNG optimisation.")
+    plot.add_argument("--snapshot-only", action="store_true",
+                      help="Only redraw the progress bars, from the fetcher's latest snapshot.")
+    plot.set_defaults(handler=cmd_plot)
+
+    cohort = subparsers.add_parser("cohort", help="Process and plot every account log in a directory.")
+    cohort.add_argument("--log-dir", default=DATA_DIR,
+                        help="Directory of per-account '<name>.jsonl' logs.")
+    cohort.add_argument("--output-dir", default=PLOTS_DIR,
+                        help="Plots go to a '<name>/' subdirectory of this per account.")
+    cohort.add_argument("--cohort-file", default=COHORT_DAILY_FILE,
+                        help="Parquet file combining every account's daily metrics.")
+    cohort.add_argument("--jobs", type=int, default=None,
+                        help="Number of worker processes (default: one per core).")
+    cohort.add_argument("--memory-limit-mb", type=int, default=None,
+                        help="Resident memory above which a worker is killed and its "
+                             "accounts retried (0 for no limit).")
+    cohort.add_argument("--force", action="store_true",
+                        help="Redraw every figure even if its inputs are unchanged.")
+    cohort.set_defaults(handler=cmd_cohort)
+
+    serve = subparsers.add_parser("serve", help="Serve metrics and plots over HTTP.")
+    serve.add_argument("--log-file", default=LOG_FILE)
+    serve.add_argument("--host", default=SERVER_HOST)
+    serve.add_argument("--port", type=int, default=SERVER_PORT)
+    serve.set_defaults(handler=cmd_serve)
+
+    schedule = subparsers.add_parser("schedule", help="Keep fetching and processing on a schedule.")
+    schedule.add_argument("--accounts", nargs="?", const="", default=None, metavar="FILE",
+                          help="Fetch every account listed in FILE (default: config/accounts.json).")
+    schedule.add_argument("--interval", type=float, default=None,
+                          help="Seconds between fetches of an account (default: SCHEDULER_INTERVAL).")
+    schedule.add_argument("--jitter", type=float, default=None,
+                          help="Random delay of up to this many seconds added to each fetch.")
+    schedule.add_argument("--dedup-mode", choices=DEDUP_MODES, default=None,
+                          help="How to log profiles unchanged since the last fetch.")
+    schedule.add_argument("--no-process", action="store_true",
+                          help="Only fetch; do not update processed data, rollups and plots.")
+    schedule.add_argument("--status-file", default=SCHEDULER_STATUS_FILE,
+                          help="JSON file with the scheduler's health and per-account state.")
+    schedule.set_defaults(handler=cmd_schedule)
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import os
 import sys
 import requests
 import json
-import polars as pl
 
 from dotenv import load_dotenv
 from datetime import datetime
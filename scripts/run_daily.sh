@@ -1,4 +1,4 @@
 #!/bin/bash 
 export PATH="$PATH:/home/alexandre/.local/bin"
 cd /home/alexandre/Documents/Florence/Python/projects/renshuu
-uv run python scripts/fetch_data.py
\ No newline at end of file
+uv run python scripts/renshuu.py fetch
\ No newline at end of file
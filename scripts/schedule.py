@@ -0,0 +1,60 @@
+"""Script to keep fetching (and processing) Renshuu data on a schedule."""
+
+import sys
+import os
+import signal
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.log_records import DEDUP_MODES
+from config.settings import SCHEDULER_STATUS_FILE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch Renshuu data on a schedule, as a resident process.")
+    parser.add_argument("--accounts", nargs="?", const="", default=None, metavar="FILE",
+                        help="Fetch every account listed in FILE (default: config/accounts.json).")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Seconds between fetches of an account (default: SCHEDULER_INTERVAL).")
+    parser.add_argument("--jitter", type=float, default=None,
+                        help="Random delay of up to this many seconds added to each fetch.")
+    parser.add_argument("--dedup-mode", choices=DEDUP_MODES, default=None,
+                        help="How to log profiles unchanged since the last fetch.")
+    parser.add_argument("--no-process", action="store_true",
+                        help="Only fetch; do not update processed data, rollups and plots.")
+    parser.add_argument("--status-file", default=SCHEDULER_STATUS_FILE,
+                        help="JSON file with the scheduler's health and per-account state.")
+    return parser.parse_args()
+
+def run(args):
+    """
+    Run the scheduler until interrupted or terminated.
+    """
+    from src.scheduler import RenshuuScheduler
+
+    try:
+        accounts = None
+        if args.accounts is not None:
+            from src.batch_fetcher import load_accounts
+            accounts = load_accounts(args.accounts or None)
+
+        scheduler = RenshuuScheduler(accounts=accounts, interval=args.interval, jitter=args.jitter,
+                                     dedup_mode=args.dedup_mode, process=not args.no_process,
+                                     status_file=args.status_file)
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    print(f"Scheduling {len(scheduler.accounts)} account(s); status in '{scheduler.status_file}' (Ctrl+C to stop).")
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    print("✓ Scheduler stopped.")
+
+def main():
+    run(parse_args())
+
+if __name__ == "__main__":
+    main()
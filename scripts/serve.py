@@ -0,0 +1,31 @@
+import sys 
+import os 
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.query_server import RenshuuQueryServer
+from config.settings import LOG_FILE, SERVER_HOST, SERVER_PORT 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve Renshuu metrics and plots over HTTP.")
+    parser.add_argument("--log-file", default=LOG_FILE)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    return parser.parse_args()
+
+def run(args):
+    """
+    Run the read-only query server until interrupted.
+    """
+    server = RenshuuQueryServer(log_file_path=args.log_file, host=args.host, port=args.port)
+    print(f"Serving Renshuu metrics on {server.base_url} (Ctrl+C to stop).")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+def main():
+    run(parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import sys 
+import os 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_processor import load_and_process_data
+from src.rollups import RenshuuRollups
+from config.settings import LOG_FILE 
+
+def main():
+    """
+    Fold newly logged days into the weekly, monthly, streak and progress delta rollups.
+    """
+    log_file = sys.argv[1] if len(sys.argv) > 1 else LOG_FILE
+
+    df_daily, df_progress, _ = load_and_process_data(log_file)
+    rollups = RenshuuRollups(log_file)
+
+    if rollups.update(df_daily, df_progress):
+        streaks = rollups.streaks()
+        print(f"✓ Rollups updated! Current streak: {streaks['current']} day(s), "
+              f"longest: {streaks['longest']} day(s).")
+    else:
+        print("✗ Failed to update rollups.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from src.data_fetcher import RenshuuDataFetcher, RateLimiter, create_session
+from src.log_writer import GroupCommitLog
+from config.settings import ACCOUNTS_FILE, DATA_DIR, FETCH_MAX_WORKERS, FETCH_RATE_LIMIT
+
+
+def load_accounts(accounts_file: str = None) -> List[Dict[str, str]]:
+    """
+    Load the accounts to fetch from a JSON list of
+    {"name": ..., "api_key": ..., "log_file": ...} entries.
+    `log_file` defaults to data/<name>.jsonl.
+    """
+    accounts_file = accounts_file or ACCOUNTS_FILE
+
+    with open(accounts_file, 'r', encoding='utf-8') as f:
+        accounts = json.load(f)
+
+    for account in accounts:
+        if not account.get("name") or not account.get("api_key"):
+            raise ValueError(f"Account entries need a 'name' and an 'api_key': {account}.")
+        account.setdefault("log_file", os.path.join(DATA_DIR, f"{account['name']}.jsonl"))
+
+    return accounts
+
+
+class RenshuuBatchFetcher:
+    """
+    Fetches and logs profiles for many accounts concurrently, sharing one
+    pool of keep-alive connections under a global rate limit. With
+    `group_commit`, fetchers logging to the same file share its writes.
+    """
+
+    def __init__(self, base_url: str = None, max_workers: int = None, rate_limit: float = None,
+                 dedup_mode: str = None, group_commit: bool = False):
+        self.base_url = base_url
+        self.dedup_mode = dedup_mode
+        self.group_commit = GroupCommitLog(dedup_mode) if group_commit else None
+        self.max_workers = max_workers or FETCH_MAX_WORKERS
+        self.session = create_session(pool_size=self.max_workers)
+        self.rate_limiter = RateLimiter(FETCH_RATE_LIMIT if rate_limit is None else rate_limit)
+
+    def _fetch_account(self, account: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Fetch and log a single account, returning its result record.
+        Any error is recorded in the result rather than raised.
+        """
+        start = time.perf_counter()
+        success, error = False, None
+        try:
+            fetcher = RenshuuDataFetcher(
+                api_key=account["api_key"],
+                base_url=self.base_url,
+                session=self.session,
+                rate_limiter=self.rate_limiter,
+                dedup_mode=self.dedup_mode,
+                group_commit=self.group_commit,
+            )
+
+            data = fetcher.fetch_profile()
+            success = bool(data) and fetcher.save_to_log(data, account["log_file"])
+            if not success:
+                error = fetcher.last_error or "Failed to write log file."
+
+        except Exception as e:
+            # One account's failure must not abort the rest of the batch.
+            error = f"{type(e).__name__}: {e}"
+
+        return {
+            "name": account["name"],
+            "success": success,
+            "elapsed": time.perf_counter() - start,
+            "error": error,
+        }
+
+    def fetch_all(self, accounts: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Fetch and log all accounts. Returns one result per account, in order.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._fetch_account, accounts))
+        if self.group_commit is not None:
+            self.group_commit.flush()
+        return results
@@ -0,0 +1,197 @@
+import os
+import time
+import threading
+import multiprocessing
+import polars as pl
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Set, Tuple
+from src.data_processor import load_and_process_data
+from src.process_pool import spawn_pool
+from src.visualizer import RenshuuVisualizer, build_render_tasks
+from config.settings import (
+    PLOTS_DIR, METRICS_FILE, COHORT_DAILY_FILE, BATCH_MAX_WORKERS, BATCH_MEMORY_LIMIT_MB
+)
+
+# How often the memory of the worker processes is checked, in seconds.
+MEMORY_POLL_INTERVAL = 0.2
+
+
+def discover_logs(log_dir: str) -> List[Dict[str, str]]:
+    """
+    One account per '<name>.jsonl' log in `log_dir`, skipping sidecar files
+    ('<name>.jsonl.quarantine.jsonl', ...) and the metrics log.
+    """
+    accounts = []
+    for file_name in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, file_name)
+        name = file_name[:-len(".jsonl")]
+        if (not file_name.endswith(".jsonl") or ".jsonl" in name or not os.path.isfile(path)
+                or os.path.abspath(path) == os.path.abspath(METRICS_FILE)):
+            continue
+        accounts.append({"name": name, "log_file": path})
+    return accounts
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """
+    Resident memory of a process in MB, or None where /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def process_account(name: str, log_file: str, output_dir: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Load, process and render one account into `output_dir/<name>/` (runs in
+    a worker process). Returns its result record with its daily metrics.
+    """
+    start = time.perf_counter()
+    result = {"name": name, "success": False, "days": 0, "figures": 0, "error": None, "daily": None}
+
+    try:
+        df_daily, df_progress, snapshots = load_and_process_data(log_file)
+        if df_daily.is_empty():
+            result["error"] = "No data available."
+        else:
+            tasks = build_render_tasks(df_daily, df_progress, snapshots)
+            viz = RenshuuVisualizer(os.path.join(output_dir, name), headless=True, use_cache=use_cache)
+            for method_name, args in tasks:
+                getattr(viz, method_name)(*args)
+
+            result.update(success=True, days=df_daily.height, figures=len(tasks), daily=df_daily)
+
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+class RenshuuBatchProcessor:
+    """
+    Processes and renders many accounts' logs in parallel across a process
+    pool and combines their daily metrics into one cohort table. A worker
+    whose resident memory goes over the limit is killed (where /proc is
+    available), failing only the account it was processing.
+    """
+
+    def __init__(self, output_dir: str = None, max_workers: int = None,
+                 memory_limit_mb: int = None, use_cache: bool = True):
+        self.output_dir = output_dir or PLOTS_DIR
+        self.max_workers = max_workers or BATCH_MAX_WORKERS or os.cpu_count()
+        self.memory_limit_mb = BATCH_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.use_cache = use_cache
+
+    def _watch_memory(self, stop: threading.Event, killed: Set[int]) -> None:
+        """
+        Kill worker processes over the memory limit until `stop` is set.
+        """
+        while not stop.wait(MEMORY_POLL_INTERVAL):
+            for process in multiprocessing.active_children():
+                rss = _rss_mb(process.pid)
+                if rss is not None and rss > self.memory_limit_mb:
+                    print(f"Worker {process.pid} uses {rss:.0f} MB, over the "
+                          f"{self.memory_limit_mb} MB limit: stopping it.")
+                    killed.add(process.pid)
+                    process.kill()
+
+    def _run_pool(self, accounts: List[Dict[str, str]],
+                  max_workers: int) -> Tuple[Dict[str, Optional[Dict[str, Any]]], bool]:
+        """
+        Process accounts in one pool. Accounts lost to a crashed or killed
+        worker come back as None.
+        Returns (results by account name, whether a worker was killed).
+        """
+        # Split the cores between the workers rather than oversubscribing.
+        threads = os.environ.get("POLARS_MAX_THREADS")
+        os.environ["POLARS_MAX_THREADS"] = str(max(1, (os.cpu_count() or 1) // max_workers))
+
+        results = {}
+        stop, killed = threading.Event(), set()
+        if self.memory_limit_mb:
+            threading.Thread(target=self._watch_memory, args=(stop, killed), daemon=True).start()
+        try:
+            with spawn_pool(max_workers) as executor:
+                futures = {
+                    executor.submit(process_account, account["name"], account["log_file"],
+                                    self.output_dir, self.use_cache): account["name"]
+                    for account in accounts
+                }
+                for future in as_completed(futures):
+                    try:
+                        results[futures[future]] = future.result()
+                    except BrokenProcessPool:
+                        results[futures[future]] = None
+        finally:
+            stop.set()
+            if threads is None:
+                os.environ.pop("POLARS_MAX_THREADS", None)
+            else:
+                os.environ["POLARS_MAX_THREADS"] = threads
+
+        return results, bool(killed)
+
+    def process_all(self, accounts: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Process and render all accounts. Returns one result per account, in
+        order; successful ones carry their daily metrics under 'daily'.
+        """
+        if not accounts:
+            return []
+        results, _ = self._run_pool(accounts, min(self.max_workers, len(accounts)))
+
+        # A lost worker takes down the whole pool, and the accounts it had not
+        # finished with it: retry them together in a fresh pool.
+        lost = [account for account in accounts if results[account["name"]] is None]
+        if lost:
+            retry, _ = self._run_pool(lost, min(self.max_workers, len(lost)))
+            results.update(retry)
+
+        # Only accounts lost twice get a pool each, so the one at fault is
+        # reported without holding up the others.
+        for account in accounts:
+            if results[account["name"]] is None:
+                retry, killed = self._run_pool([account], 1)
+                results[account["name"]] = retry[account["name"]] or {
+                    "name": account["name"], "success": False, "days": 0, "figures": 0, "elapsed": 0.0,
+                    "error": "Exceeded the worker memory limit." if killed else "Worker process crashed.",
+                    "daily": None,
+                }
+
+        return [results[account["name"]] for account in accounts]
+
+    @staticmethod
+    def write_cohort(results: List[Dict[str, Any]], cohort_file: str = None) -> bool:
+        """
+        Write the daily metrics of all successful accounts to one Parquet
+        table with an 'account' column. Returns True if successful.
+        """
+        cohort_file = cohort_file or COHORT_DAILY_FILE
+        frames = [result for result in results if result["success"]]
+        if not frames:
+            print("No account data to combine.")
+            return False
+
+        accounts = pl.Enum([result["name"] for result in frames])
+        try:
+            df_cohort = pl.concat([
+                result["daily"].select([
+                    pl.lit(result["name"], dtype=accounts).alias("account"), pl.all()
+                ])
+                for result in frames
+            ], how="diagonal_relaxed")
+
+            os.makedirs(os.path.dirname(os.path.abspath(cohort_file)), exist_ok=True)
+            df_cohort.write_parquet(cohort_file + ".tmp")
+            os.replace(cohort_file + ".tmp", cohort_file)
+
+            print(f"Wrote {len(df_cohort)} daily rows for {len(frames)} accounts to '{cohort_file}'.")
+            return True
+
+        except Exception as e:
+            print(f"Error writing cohort table: {e}.")
+            return False
@@ -0,0 +1,137 @@
+import calendar
+import datetime
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import Normalize, to_rgba
+from typing import Tuple
+
+# Layout and colours follow calplot's defaults so both renderers look alike.
+FILL_COLOR = 'whitesmoke'
+LINE_COLOR = 'white'
+MONTH_EDGE_COLOR = 'gray'
+YEAR_LABEL_KWS = {
+    'fontsize': 30,
+    'color': 'gray',
+    'fontname': 'Helvetica',
+    'fontweight': 'bold',
+    'ha': 'center',
+}
+
+
+def _year_grid(year: int, days: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Map one year of daily values onto a 7 x weeks grid (Monday on top).
+    Returns (grid of values, NaN where missing; mask of days in the year).
+    """
+    first = np.datetime64(f"{year}-01-01")
+    n_days = (np.datetime64(f"{year + 1}-01-01") - first).astype(int)
+    start_weekday = datetime.date(year, 1, 1).weekday()
+    n_weeks = (n_days - 1 + start_weekday) // 7 + 1
+
+    grid = np.full((7, n_weeks), np.nan)
+    in_year = np.zeros((7, n_weeks), dtype=bool)
+
+    doy = np.arange(n_days)
+    weekday = (doy + start_weekday) % 7
+    week = (doy + start_weekday) // 7
+    in_year[6 - weekday, week] = True
+
+    selected = (days >= first) & (days < first + n_days)
+    day_index = (days[selected] - first).astype(int)
+    grid[6 - (day_index + start_weekday) % 7, (day_index + start_weekday) // 7] = values[selected]
+
+    return grid, in_year
+
+
+def _month_borders(year: int) -> list:
+    """
+    Outline polygons for the twelve months of a year.
+    """
+    start = datetime.date(year, 1, 1).weekday()
+    polygons = []
+    for month in range(1, 13):
+        first = datetime.date(year, month, 1)
+        last = datetime.date(year, month, calendar.monthrange(year, month)[1])
+        y0 = 7 - first.weekday()
+        y1 = 7 - last.weekday()
+        x0 = (first.timetuple().tm_yday + start - 1) // 7
+        x1 = (last.timetuple().tm_yday + start - 1) // 7
+        polygons.append([
+            (x0, y0), (x0 + 1, y0), (x0 + 1, 7), (x1 + 1, 7),
+            (x1 + 1, y1 - 1), (x1, y1 - 1), (x1, 0), (x0, 0),
+        ])
+    return polygons
+
+
+def calendar_heatmap(dates: np.ndarray, values: np.ndarray, cmap: str = 'YlGn',
+                     suptitle: str = None, yearlabel_kws: dict = None):
+    """
+    Draw a calendar heatmap with one row of axes per year and a single
+    pcolormesh call per year.
+    `dates` are daily datetime64 values, `values` the matching numbers.
+    Returns (fig, axes).
+    """
+    days = dates.astype("datetime64[D]")
+    order = np.argsort(days)
+    days, values = days[order], values[order].astype(np.float64)
+
+    # Missing days inside the observed range count as zero activity.
+    span = np.arange(days[0], days[-1] + 1)
+    daily = np.zeros(len(span))
+    np.add.at(daily, (days - days[0]).astype(int), np.nan_to_num(values))
+
+    # Mostly-idle series only colour the active days.
+    if np.count_nonzero(daily == 0) > 0.5 * len(daily):
+        daily[daily == 0] = np.nan
+
+    norm = Normalize(vmin=np.nanmin(daily), vmax=np.nanmax(daily))
+    colormap = plt.get_cmap(cmap)
+    fill_rgba = np.array(to_rgba(FILL_COLOR))
+
+    years = np.arange(span[0].astype("datetime64[Y]").astype(int) + 1970,
+                      span[-1].astype("datetime64[Y]").astype(int) + 1971)
+    label_kws = dict(YEAR_LABEL_KWS, **(yearlabel_kws or {}))
+
+    fig, axes = plt.subplots(nrows=len(years), ncols=1, squeeze=False,
+                             figsize=(10, 1.7 * len(years)))
+    axes = axes.T[0]
+
+    max_weeks = 0
+    for year, ax in zip(years, axes):
+        grid, in_year = _year_grid(int(year), span, daily)
+
+        rgba = colormap(norm(np.nan_to_num(grid)))
+        rgba[np.isnan(grid)] = fill_rgba
+        rgba[~in_year] = 0.0
+        ax.pcolormesh(rgba, edgecolors=LINE_COLOR, linewidth=1)
+
+        ax.add_collection(PolyCollection(
+            _month_borders(int(year)), edgecolors=MONTH_EDGE_COLOR, facecolors='none',
+            linewidths=1, zorder=20, clip_on=False
+        ))
+
+        n_weeks = grid.shape[1]
+        max_weeks = max(max_weeks, n_weeks)
+        ax.set(xlim=(0, n_weeks), ylim=(0, 7))
+        ax.set_aspect('equal')
+        for side in ('top', 'right', 'left', 'bottom'):
+            ax.spines[side].set_visible(False)
+        for axis in (ax.xaxis, ax.yaxis):
+            axis.set_tick_params(which='both', length=0)
+
+        ax.set_xticks([datetime.date(int(year), month, 15).isocalendar()[1] for month in range(1, 13)])
+        ax.set_xticklabels(calendar.month_abbr[1:])
+        ax.yaxis.set_ticks_position('right')
+        ax.set_yticks([6 - i + 0.5 for i in range(7)])
+        ax.set_yticklabels(calendar.day_abbr[:], rotation='horizontal', va='center')
+        ax.set_ylabel(str(year), **label_kws)
+
+    # Keep the same width for every year.
+    for ax in axes:
+        ax.set_xlim(0, max_weeks)
+
+    plt.tight_layout()
+    plt.suptitle(suptitle, y=1)
+
+    return fig, axes
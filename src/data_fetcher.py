@@ -1,63 +1,174 @@
-import os 
 import sys 
+import time 
+import threading 
 import requests 
 import json 
 from datetime import datetime 
 from typing import Dict, Any, Optional 
-from config.settings import REN_API_KEY, API_BASE_URL, LOG_FILE
+from requests.adapters import HTTPAdapter 
+from src.instrumentation import instrument, current_stage
+from src.log_records import DEDUP_MODES
+from src.log_writer import LogWriter, GroupCommitLog
+from config.settings import (
+    REN_API_KEY, API_BASE_URL, LOG_FILE, 
+    REQUEST_TIMEOUT, MAX_RETRIES, RETRY_BACKOFF,
+    FETCH_DEDUP_MODE
+)
+
+# Responses worth retrying: rate limiting and transient server errors.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Create a session with a pool of keep-alive connections.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter: 
+    """
+    Thread-safe limiter spacing calls to at most `rate` per second.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        """
+        Block until the next call is allowed.
+        """
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            scheduled = max(now, self.next_time)
+            self.next_time = scheduled + self.interval
+
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
 
 class RenshuuDataFetcher: 
     """
     Handles fetching data from Renshuu API and logging to JSONL files.
     """
 
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, 
+                 session: requests.Session = None, rate_limiter: RateLimiter = None,
+                 timeout: float = None, max_retries: int = None, dedup_mode: str = None,
+                 group_commit: GroupCommitLog = None):
         self.api_key = api_key or REN_API_KEY
         self.base_url = base_url or API_BASE_URL
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
+        self.session = session or create_session()
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout or REQUEST_TIMEOUT
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.dedup_mode = dedup_mode or FETCH_DEDUP_MODE
+        self.group_commit = group_commit
+        self.last_error = None
 
         if not self.api_key: 
             raise ValueError("API key not found. Please set REN_API_KEY in your .env file.")
+        if self.dedup_mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{self.dedup_mode}', expected one of {DEDUP_MODES}.")
         
+    @instrument()
     def fetch_profile(self) -> Optional[Dict[str, Any]]:
         """
         Fetch profile data from Renshuu API.
         """
         profile_url = f"{self.base_url}/profile"
+        self.last_error = None
 
-        try:
-            response = requests.get(profile_url, headers=self.headers)
-            response.raise_for_status() 
-            return response.json()
-    
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP error occurred: {e}.")
-            print(f"Response content: {response.text}")
-        except requests.exceptions.ConnectionError as e:
-            print(f"Connection error: {e}.")
-        except requests.exceptions.Timeout as e:
-            print(f"Timeout error: {e}.")
-        except requests.exceptions.RequestException as e:
-            print(f"Request error: {e}.")
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {e}.")
-            print(f"Raw response: {response.text}")
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self._retry_delay(attempt, response))
+            response = None
+
+            try:
+                if self.rate_limiter:
+                    self.rate_limiter.wait()
+                response = self.session.get(profile_url, headers=self.headers, timeout=self.timeout)
+
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    print(f"Got HTTP {response.status_code}, retrying ({attempt + 1}/{self.max_retries}).")
+                    continue
+
+                response.raise_for_status() 
+                current_stage().bytes_read += len(response.content)
+                return response.json()
+        
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if attempt < self.max_retries:
+                    print(f"{self.last_error}, retrying ({attempt + 1}/{self.max_retries}).")
+                    continue
+                print(f"Connection error: {e}.")
+            except requests.exceptions.HTTPError as e:
+                self.last_error = str(e)
+                print(f"HTTP error occurred: {e}.")
+                print(f"Response content: {response.text}")
+            except requests.exceptions.RequestException as e:
+                self.last_error = str(e)
+                print(f"Request error: {e}.")
+            except json.JSONDecodeError as e:
+                self.last_error = f"JSON decode error: {e}"
+                print(f"JSON decode error: {e}.")
+                print(f"Raw response: {response.text}")
+
+            return None
 
         return None 
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """
+        Exponential backoff, honouring a numeric Retry-After header if sent.
+        """
+        delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("Retry-After", 0)))
+            except ValueError:
+                pass
+        return delay
     
+    @instrument()
     def save_to_log(self, data: Dict[str, Any], log_file: str = None) -> bool: 
         """
         Save data to JSONL log file. 
+        Unless the dedup mode is 'off', a profile identical to the last one is
+        skipped or logged as a marker, and in 'delta' mode a changed one is
+        logged as its differences from the last full record.
+        The line is appended under the log's lock, or through `group_commit`
+        together with other fetchers' records.
         """
         log_file = log_file or LOG_FILE 
 
         data['fetch_timestamp'] = datetime.now().isoformat()
 
         try: 
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
-            with open(log_file, 'a', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False)
-                f.write('\n')
+            if self.group_commit is not None:
+                line = self.group_commit.append(log_file, data)
+            else:
+                line = LogWriter(log_file, self.dedup_mode).append([data])[0]
+
+            stage = current_stage()
+            if line is None:
+                print("Profile unchanged since the last fetch today, nothing to log.")
+                stage.rows = 0
+                return True
+
+            stage.rows = 1
+            stage.bytes_written += len(line.encode('utf-8'))
             return True 
     
         except IOError as e:
@@ -1,8 +1,22 @@
 import os
+import json
 import polars as pl 
 import pandas as pd 
-from typing import Tuple, Dict
+from datetime import date
+from typing import Any, List, Tuple, Dict, Optional, Union
 from config.settings import CATEGORIES, LEVELS 
+from src.instrumentation import instrument
+from src.day_index import DayIndex
+from src.log_records import resolve_records, has_encoded_records
+from src.log_segments import LogSegments, LogPosition
+from src.log_ingest import LogIngest, LogFileLines, TIMESTAMP_FORMAT
+from src.latest_snapshot import read_latest_snapshot
+
+# Sidecar files used for incremental ingest of the append-only log.
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+DEDUP_CACHE_SUFFIX = ".dedup.parquet"
+
+Frame = Union[pl.DataFrame, pl.LazyFrame]
 
 class RenshuuDataProcessor: 
     """
@@ -10,33 +24,206 @@ class RenshuuDataProcessor:
     Fully Polars-flavoured.
     """
 
+    @staticmethod
+    def _read_checkpoint(log_file_path: str) -> Tuple[LogPosition, Optional[pl.DataFrame]]:
+        """
+        Return (log position, cached deduplicated rows) for a log, or
+        ((0, 0), None) if there is no usable checkpoint.
+        """
+        checkpoint_path = log_file_path + CHECKPOINT_SUFFIX
+        cache_path = log_file_path + DEDUP_CACHE_SUFFIX
+
+        if not (os.path.exists(checkpoint_path) and os.path.exists(cache_path)):
+            return (0, 0), None
+
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+
+            position = (checkpoint.get("segments", 0), checkpoint["offset"])
+            # A smaller file or a different head means the log was replaced.
+            if not LogSegments(log_file_path).is_valid(position, checkpoint["head"]):
+                print("Log file changed since last checkpoint, reloading from scratch.")
+                return (0, 0), None
+
+            return position, pl.read_parquet(cache_path)
+
+        except Exception as e:
+            print(f"Ignoring unreadable checkpoint: {e}.")
+            return (0, 0), None
+
+    @staticmethod
+    def _write_checkpoint(log_file_path: str, position: LogPosition, deduplicated_df: pl.DataFrame) -> None:
+        """
+        Persist the deduplicated rows and the log position they cover.
+        """
+        checkpoint_path = log_file_path + CHECKPOINT_SUFFIX
+        cache_path = log_file_path + DEDUP_CACHE_SUFFIX
+
+        try:
+            deduplicated_df.write_parquet(cache_path + ".tmp")
+            os.replace(cache_path + ".tmp", cache_path)
+
+            checkpoint = {
+                "segments": position[0],
+                "offset": position[1],
+                "head": LogSegments(log_file_path).head(position),
+            }
+            with open(checkpoint_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+            os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+        except Exception as e:
+            print(f"Warning: could not write checkpoint: {e}.")
+
+    @staticmethod
+    def _latest_per_day(df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Reduce raw log rows to the last fetch of each day.
+        """
+        return RenshuuDataProcessor._deduplicate_by_date(RenshuuDataProcessor._add_fetch_dates(df))
+
+    @staticmethod
+    def _read_log_tail(log_file_path: str, offset: int, ingest: LogIngest,
+                       use_index: bool = True) -> Tuple[pl.DataFrame, int]:
+        """
+        Parse the complete lines appended after `offset`. With the day index,
+        only the latest line of each day is parsed, which is all that survives
+        deduplication. Marker and delta records are rebuilt into full ones.
+        Returns the parsed rows and the offset just past the last complete line.
+        """
+        resolve = lambda data: resolve_records(log_file_path, data)
+
+        if use_index:
+            index = DayIndex.load(log_file_path)
+            if index.update():
+                index.save()
+
+            source = os.path.basename(log_file_path)
+            # Lines without a timestamp belong to no day, so the index never
+            # returns them: quarantine them here, as the full scan would.
+            ingest.quarantine((source, line_offset, line) for line_offset, line in index.iter_untimed_lines(offset))
+
+            skipped = len(ingest.skipped)
+            lines = ((source, line_offset, line) for line_offset, line in index.iter_latest_lines(offset))
+            df = ingest.parse(lines, resolve, RenshuuDataProcessor._latest_per_day)
+            if len(ingest.skipped) == skipped:
+                return df, max(index.end, offset)
+            # Some day's latest line was unusable: read every line so its
+            # earlier fetches stand in for it.
+
+        lines = LogFileLines(log_file_path, offset)
+        df = ingest.parse(lines, resolve, RenshuuDataProcessor._latest_per_day)
+        return df, lines.end
+
+    @staticmethod
+    def _read_log_since(log_file_path: str, position: LogPosition = (0, 0),
+                        start_date: Optional[date] = None,
+                        end_date: Optional[date] = None) -> Tuple[pl.DataFrame, LogPosition]:
+        """
+        Parse the log from `position` on: the closed segments not read yet
+        (skipping those outside the date range), then the active log.
+        Rows are parsed in bounded chunks and reduced to the last fetch of
+        each day; malformed lines are quarantined.
+        Returns the parsed rows and the position reached.
+        """
+        segments = LogSegments(log_file_path)
+        ingest = LogIngest(log_file_path)
+        segment, offset = position
+
+        df_segments = pl.DataFrame()
+        if segment < len(segments):
+            df_segments = ingest.parse(segments.read(position, start_date, end_date),
+                                       reduce=RenshuuDataProcessor._latest_per_day)
+            if ingest.skipped:
+                lines = segments.read(position, start_date, end_date, latest_only=False)
+                df_segments = ingest.parse(lines, reduce=RenshuuDataProcessor._latest_per_day)
+            offset = 0
+
+        df, new_offset = RenshuuDataProcessor._read_log_tail(log_file_path, offset, ingest)
+        if not df_segments.is_empty():
+            df = RenshuuDataProcessor._latest_per_day(
+                pl.concat([df_segments, df], how="diagonal_relaxed")
+            ) if not df.is_empty() else df_segments
+
+        if ingest.skipped:
+            print(f"Skipped {len(ingest.skipped)} malformed log line(s), see '{ingest.quarantine_path}'.")
+        return df, (len(segments), new_offset)
+
+    @staticmethod
+    def _add_fetch_dates(df: Frame) -> Frame:
+        """
+        Add the parsed 'full_timestamp' and its 'fetch_date' to raw log rows.
+        """
+        # Convert 'fetch_timestamp' string to a Polars Datetime column. 
+        df = df.with_columns([
+            pl.col("fetch_timestamp")
+            .str.strptime(pl.Datetime, format=TIMESTAMP_FORMAT)
+            .alias("full_timestamp"),
+        ])
+
+        # Extract the date part from the 'full_timestamp' Datetime column.
+        return df.with_columns([
+            pl.col("full_timestamp").dt.date().alias("fetch_date")
+        ])
+
+    @staticmethod
+    def _deduplicate_by_date(df: Frame) -> Frame:
+        """
+        Keep the last fetch of each day, ordered by date.
+        """
+        return (
+            df.sort("full_timestamp")
+            .unique(subset=["fetch_date"], keep="last")
+            .sort("fetch_date")
+        )
+
     @staticmethod 
-    def load_and_deduplicate_logs(log_file_path: str) -> pl.DataFrame:
+    @instrument()
+    def load_and_deduplicate_logs(log_file_path: str, use_checkpoint: bool = True,
+                                  start_date: Optional[date] = None,
+                                  end_date: Optional[date] = None) -> pl.DataFrame:
         """
-        Load and deduplicate Renshuu log data.
+        Load and deduplicate Renshuu log data, across rotated segments.
+        With `use_checkpoint`, only the lines appended since the previous run
+        are parsed and merged into the cached daily rows. A date range skips
+        segments outside it and bypasses the checkpoint.
         """
+        date_range = start_date is not None or end_date is not None
+        use_checkpoint = use_checkpoint and not date_range
+
         if not os.path.exists(log_file_path):
             print(f"Error: Log file '{log_file_path}' not found.")
             return pl.DataFrame()
     
         try:
-            df = pl.read_ndjson(log_file_path)
+            position, cached_df = (0, 0), None
+            if use_checkpoint:
+                position, cached_df = RenshuuDataProcessor._read_checkpoint(log_file_path)
 
-            # Convert 'fetch_timestamp' string to a Polars Datetime column. 
-            df = df.with_columns([
-                pl.col("fetch_timestamp")
-                .str.strptime(pl.Datetime, format="%Y-%m-%dT%H:%M:%S%.f")
-                .alias("full_timestamp"),
-            ])
+            df, new_position = RenshuuDataProcessor._read_log_since(
+                log_file_path, position, start_date, end_date
+            )
 
-            # Extract the date part from the 'full_timestamp' Datetime column.
-            df = df.with_columns([
-                pl.col("full_timestamp").dt.date().alias("fetch_date")
-            ])
+            if df.is_empty():
+                deduplicated_df = cached_df if cached_df is not None else pl.DataFrame()
+            else:
+                df = RenshuuDataProcessor._add_fetch_dates(df)
 
-            # Sort and deduplicate.
-            df = df.sort("full_timestamp")
-            deduplicated_df = df.unique(subset=["fetch_date"], keep="last")
+                if cached_df is not None and not cached_df.is_empty():
+                    df = pl.concat([cached_df, df], how="diagonal_relaxed")
+
+                # Sort and deduplicate.
+                deduplicated_df = RenshuuDataProcessor._deduplicate_by_date(df)
+
+            if date_range and not deduplicated_df.is_empty():
+                if start_date is not None:
+                    deduplicated_df = deduplicated_df.filter(pl.col("fetch_date") >= start_date)
+                if end_date is not None:
+                    deduplicated_df = deduplicated_df.filter(pl.col("fetch_date") <= end_date)
+
+            if use_checkpoint and new_position != position and not deduplicated_df.is_empty():
+                RenshuuDataProcessor._write_checkpoint(log_file_path, new_position, deduplicated_df)
 
             print(f"Successfully loaded {len(deduplicated_df)} daily entries.")
             return deduplicated_df 
@@ -46,14 +233,11 @@ class RenshuuDataProcessor:
             return pl.DataFrame()
         
     @staticmethod
-    def extract_daily_activity_metrics(deduplicated_df: pl.DataFrame) -> pl.DataFrame:
+    def _daily_activity_query(frame: Frame) -> Frame:
         """
-        Extract daily activity metrics.
+        Build the daily activity selection on an eager or lazy frame.
         """
-        if deduplicated_df.is_empty():
-            return pl.DataFrame()
-        
-        df_daily_metrics = deduplicated_df.select([
+        return frame.select([
             pl.col("fetch_date").cast(pl.Datetime), 
             pl.col("studied").struct.field("today_all").fill_null(0).alias("daily_all"),
             pl.col("studied").struct.field("today_grammar").fill_null(0).alias("daily_grammar"),
@@ -62,9 +246,97 @@ class RenshuuDataProcessor:
             pl.col("studied").struct.field("today_sent").fill_null(0).alias("daily_sent"),
         ]).sort("fetch_date")
 
-        return df_daily_metrics 
+    @staticmethod
+    def _progress_pairs(progress_schema: pl.Struct) -> Tuple[List[Tuple[str, str]], pl.Enum, pl.Enum]:
+        """
+        The (category, level) pairs present in the `level_progress_percs`
+        struct, and Enum dtypes listing the configured categories and levels
+        first, then any new ones. Reports drift from the settings.
+        """
+        pairs = [
+            (category.name, level.name)
+            for category in progress_schema.fields
+            for level in category.dtype.fields
+        ]
+        categories = list(dict.fromkeys(category for category, _ in pairs))
+        levels = list(dict.fromkeys(level for _, level in pairs))
+
+        new_categories = [category for category in categories if category not in CATEGORIES]
+        new_levels = [level for level in levels if level not in LEVELS]
+        missing = [category for category in CATEGORIES if category not in categories]
+        if new_categories or new_levels:
+            print(f"Warning: progress data has categories {new_categories} and levels "
+                  f"{new_levels} that are not in the settings.")
+        if missing:
+            print(f"Warning: progress data has no {missing} categories.")
+
+        category_enum = pl.Enum(list(CATEGORIES) + new_categories)
+        level_enum = pl.Enum(LEVELS + new_levels)
+        return pairs, category_enum, level_enum
+
+    @staticmethod
+    def _level_progress_query(frame: Frame) -> Frame:
+        """
+        Build the long-format level progress query on an eager or lazy frame.
+        One date-ordered block per (category, level) found in the data, with
+        Enum category/level columns and Float32 percentages.
+        """
+        pairs, category_enum, level_enum = RenshuuDataProcessor._progress_pairs(
+            frame.collect_schema()["level_progress_percs"]
+        )
+        progress = pl.col("level_progress_percs")
+        frame = frame.sort("fetch_date")
+
+        return pl.concat([
+            frame.select([
+                pl.col("fetch_date"),
+                pl.lit(category, dtype=category_enum).alias("category"),
+                pl.lit(level, dtype=level_enum).alias("level"),
+                progress.struct.field(category).struct.field(level)
+                    .fill_null(0).cast(pl.Float32).alias("percentage"),
+            ])
+            for category, level in pairs
+        ])
+
+    @staticmethod
+    def _snapshot_queries(frame: Frame) -> Dict[str, Frame]:
+        """
+        Build the per-category latest snapshot on an eager or lazy frame.
+        A configured category missing from the data gets a frame without
+        columns, and only the levels present are selected and sorted on.
+        """
+        progress_schema = frame.collect_schema()["level_progress_percs"]
+        present = {category.name: [level.name for level in category.dtype.fields]
+                   for category in progress_schema.fields}
+        latest_data = frame.filter(
+            pl.col("fetch_date") == pl.col("fetch_date").max()
+        )
+
+        snapshots = {}
+        for cat in CATEGORIES.keys():
+            if cat not in present:
+                snapshots[cat] = latest_data.select([])
+                continue
+            snapshot = latest_data.select([
+                pl.col("level_progress_percs").struct.field(cat)
+            ]).unnest(cat)
+            levels = [level for level in LEVELS if level in present[cat]]
+            snapshots[cat] = snapshot.sort(by=levels) if levels else snapshot
+        return snapshots
+
+    @staticmethod
+    @instrument()
+    def extract_daily_activity_metrics(deduplicated_df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Extract daily activity metrics.
+        """
+        if deduplicated_df.is_empty():
+            return pl.DataFrame()
+        
+        return RenshuuDataProcessor._daily_activity_query(deduplicated_df)
     
     @staticmethod 
+    @instrument()
     def extract_level_progress_metrics(deduplicated_df: pl.DataFrame) -> pl.DataFrame:
         """
         Extract level progress metrics in long format.
@@ -72,39 +344,10 @@ class RenshuuDataProcessor:
         if deduplicated_df.is_empty():
             return pl.DataFrame()
                 
-        # Unnest level_progress_percs.
-        df_progress = deduplicated_df.select([
-            pl.col("fetch_date"),
-            pl.col("level_progress_percs")
-        ]).unnest("level_progress_percs")
-
-        # Create expressions for each category-level combination.
-        expressions = [pl.col("fetch_date")]
-        for category in CATEGORIES.keys():
-            for level in LEVELS:
-                expressions.append(
-                    pl.col(category).struct.field(level)
-                        .fill_null(0)
-                        .alias(f"{category}_{level}")
-                )
-        
-        df_flat = df_progress.select(expressions).sort("fetch_date")
-        id_vars = ["fetch_date"]
-        value_vars = [col for col in df_flat.columns if col not in id_vars]
-
-        df_long = df_flat.unpivot(
-            on=value_vars,
-            index=id_vars,
-            variable_name="metric_level",
-            value_name="percentage"
-        ).with_columns([
-            pl.col("metric_level").str.split_exact("_", 1).struct.field("field_0").alias("category"),
-            pl.col("metric_level").str.split_exact("_", 1).struct.field("field_1").alias("level")
-        ])
-        
-        return df_long 
+        return RenshuuDataProcessor._level_progress_query(deduplicated_df)
 
     @staticmethod
+    @instrument()
     def get_latest_progress_snapshot(deduplicated_df: pl.DataFrame) -> Dict[str, pl.DataFrame]:
         """
         Get the latest snapshot of progress per category for bar charts or heatmap matrices.
@@ -113,41 +356,137 @@ class RenshuuDataProcessor:
         if deduplicated_df.is_empty():
             return {}
     
-        latest_date = deduplicated_df.select(
-            pl.col("fetch_date").max()
-        ).item()
-        latest_data = deduplicated_df.filter(
-            pl.col("fetch_date") == latest_date
-        )
+        return RenshuuDataProcessor._snapshot_queries(deduplicated_df)
 
-        snapshots = {}
-        for cat in CATEGORIES.keys():
-            df_cat = latest_data.select([
-                pl.col("level_progress_percs").struct.field(cat)
-            ]).unnest(cat).sort(by=LEVELS)
-
-            snapshots[cat] = df_cat 
-
-        return snapshots
+    @staticmethod
+    def snapshot_from_latest(snapshot: Dict[str, Any]) -> Dict[str, pl.DataFrame]:
+        """
+        Per-category progress frames from a latest-snapshot file, shaped like
+        those of get_latest_progress_snapshot.
+        """
+        levels = {category: {} for category in CATEGORIES}
+        for entry in snapshot["progress"]:
+            if entry["category"] in levels:
+                levels[entry["category"]][entry["level"]] = [entry["percentage"]]
+        return {category: pl.DataFrame(values) for category, values in levels.items()}
 
 
 
+@instrument()
 def load_and_process_data(log_file_path: str) -> Tuple[pl.DataFrame, pl.DataFrame, Dict[str, pl.Series]]:
     """
     Load and process raw data into daily metrics, long-format progress metrics,
     and the latest snapshot of progress by category.
+    Reads the compacted columnar store first if one exists for the log.
     Returns (daily_metrics, progress_metrics, snapshots).
     """
+    from src.log_store import RenshuuLogStore
+
     processor = RenshuuDataProcessor()
     # Load and deduplicate.
-    deduplicated_df = processor.load_and_deduplicate_logs(log_file_path)
+    deduplicated_df = None
+    try:
+        deduplicated_df = RenshuuLogStore(log_file_path).load_deduplicated()
+    except Exception as e:
+        print(f"Error loading compacted store, falling back to the log: {e}.")
+
+    if deduplicated_df is None:
+        deduplicated_df = processor.load_and_deduplicate_logs(log_file_path)
 
     if deduplicated_df.is_empty():
-        return pl.DataFrame(), pl.DataFrame(), 
+        return pl.DataFrame(), pl.DataFrame(), {}
     
     # Extract metrics.
     daily_metrics = processor.extract_daily_activity_metrics(deduplicated_df)
     progress_metrics = processor.extract_level_progress_metrics(deduplicated_df)
     snapshots = processor.get_latest_progress_snapshot(deduplicated_df)
 
-    return daily_metrics, progress_metrics, snapshots
\ No newline at end of file
+    return daily_metrics, progress_metrics, snapshots
+
+
+@instrument()
+def load_latest_snapshot(log_file_path: str) -> Dict[str, pl.DataFrame]:
+    """
+    The latest progress snapshot by category. Read from the snapshot file the
+    fetcher keeps next to the log while it is up to date, without touching
+    the log; computed from the whole history otherwise.
+    """
+    snapshot = read_latest_snapshot(log_file_path)
+    if snapshot is not None:
+        return RenshuuDataProcessor.snapshot_from_latest(snapshot)
+
+    print("No up-to-date latest snapshot, loading the log.")
+    return load_and_process_data(log_file_path)[2]
+
+
+def _collect_lazy(log_file_path: str, fault_tolerant: bool,
+                  start_date: Optional[date], end_date: Optional[date]) -> Tuple[List[pl.DataFrame], List[str]]:
+    """
+    Build and collect the lazy queries of load_and_process_data_lazy, scanning
+    the log directly or through the fault-tolerant reader.
+    Returns ([daily, progress, *snapshots], snapshot categories).
+    """
+    processor = RenshuuDataProcessor()
+    if fault_tolerant:
+        lf = processor._read_log_since(log_file_path, (0, 0), start_date, end_date)[0].lazy()
+    else:
+        # Same full-log inference as LogIngest, so both paths see every category and level.
+        lf = pl.scan_ndjson(log_file_path, infer_schema_length=None)
+    lf = lf.select(["fetch_timestamp", "studied", "level_progress_percs"])
+    lf = processor._add_fetch_dates(lf)
+
+    if start_date is not None:
+        lf = lf.filter(pl.col("fetch_date") >= start_date)
+    if end_date is not None:
+        lf = lf.filter(pl.col("fetch_date") <= end_date)
+
+    deduplicated_lf = processor._deduplicate_by_date(lf)
+
+    snapshot_queries = processor._snapshot_queries(deduplicated_lf)
+    results = pl.collect_all([
+        processor._daily_activity_query(deduplicated_lf),
+        processor._level_progress_query(deduplicated_lf),
+        *snapshot_queries.values(),
+    ])
+    return results, list(snapshot_queries.keys())
+
+
+@instrument()
+def load_and_process_data_lazy(log_file_path: str, 
+                               start_date: Optional[date] = None, 
+                               end_date: Optional[date] = None
+                               ) -> Tuple[pl.DataFrame, pl.DataFrame, Dict[str, pl.DataFrame]]:
+    """
+    Lazy variant of load_and_process_data restricted to an optional date window.
+    Only the columns the outputs need are scanned, and all outputs are collected
+    together from one query plan.
+    Returns (daily_metrics, progress_metrics, snapshots).
+    """
+    if not os.path.exists(log_file_path):
+        print(f"Error: Log file '{log_file_path}' not found.")
+        return pl.DataFrame(), pl.DataFrame(), {}
+
+    try:
+        # Marker and delta lines only become full rows once resolved, and
+        # segments outside the date window are skipped before parsing.
+        fault_tolerant = has_encoded_records(log_file_path) or len(LogSegments(log_file_path)) > 0
+        try:
+            results, categories = _collect_lazy(log_file_path, fault_tolerant, start_date, end_date)
+        except Exception as e:
+            if fault_tolerant:
+                raise
+            # A malformed line fails the whole scan: parse chunk by chunk instead.
+            print(f"Scanning the log failed ({e}), retrying with the fault-tolerant reader.")
+            results, categories = _collect_lazy(log_file_path, True, start_date, end_date)
+
+    except Exception as e:
+        print(f"Error loading data: {e}.")
+        return pl.DataFrame(), pl.DataFrame(), {}
+
+    daily_metrics, progress_metrics = results[0], results[1]
+    if daily_metrics.is_empty():
+        return pl.DataFrame(), pl.DataFrame(), {}
+
+    snapshots = dict(zip(categories, results[2:]))
+    print(f"Successfully loaded {len(daily_metrics)} daily entries.")
+    return daily_metrics, progress_metrics, snapshots
@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Sidecar mapping each date to the byte offset of its latest log line.
+DAY_INDEX_SUFFIX = ".days.json"
+HEAD_BYTES = 4096
+TIMESTAMP_KEY = b'"fetch_timestamp"'
+
+
+def file_head(log_file_path: str, offset: int) -> str:
+    """
+    Fingerprint the start of the log (up to `offset`) so a rewritten file
+    is not mistaken for the one a sidecar was built from.
+    """
+    with open(log_file_path, 'rb') as f:
+        return head_digest(f.read(min(offset, HEAD_BYTES)))
+
+
+def head_digest(head: bytes) -> str:
+    return hashlib.sha1(head[:HEAD_BYTES]).hexdigest()
+
+
+def line_timestamp(line: bytes) -> Optional[str]:
+    """
+    Extract 'fetch_timestamp' from a raw log line without parsing all of it.
+    """
+    position = line.rfind(TIMESTAMP_KEY)
+    if position != -1:
+        start = line.find(b'"', position + len(TIMESTAMP_KEY)) + 1
+        end = line.find(b'"', start)
+        if start and end != -1:
+            return line[start:end].decode('ascii', errors='ignore')
+
+    try:
+        return json.loads(line).get("fetch_timestamp")
+    except (ValueError, AttributeError):
+        return None
+
+
+def add_latest(days: Dict[str, Tuple[int, str]], offset: int, timestamp: Optional[str]) -> None:
+    """
+    Record the line at `offset` in `days` if it is the latest of its day.
+    """
+    if not timestamp:
+        return
+    day = timestamp[:10]
+    current = days.get(day)
+    if current is None or timestamp >= current[1]:
+        days[day] = (offset, timestamp)
+
+
+class DayIndex:
+    """
+    Maps each fetch date to the offset and timestamp of its latest log line,
+    so loading can read one line per day instead of every fetch. Offsets of
+    lines without a timestamp are kept too, so they can still be quarantined.
+    """
+
+    def __init__(self, log_file_path: str):
+        self.log_file_path = log_file_path
+        self.index_path = log_file_path + DAY_INDEX_SUFFIX
+        self.end = 0
+        self.days: Dict[str, Tuple[int, str]] = {}
+        self.untimed: List[int] = []
+
+    @classmethod
+    def load(cls, log_file_path: str) -> "DayIndex":
+        """
+        Load the index for a log, starting empty if it is missing or stale.
+        """
+        index = cls(log_file_path)
+        if not (os.path.exists(index.index_path) and os.path.exists(log_file_path)):
+            return index
+
+        try:
+            with open(index.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Indexes written before untimed lines were tracked are rebuilt.
+            if ("untimed" in data and os.path.getsize(log_file_path) >= data["end"]
+                    and file_head(log_file_path, data["end"]) == data["head"]):
+                index.end = data["end"]
+                index.days = {day: tuple(entry) for day, entry in data["days"].items()}
+                index.untimed = data["untimed"]
+        except (IOError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable day index: {e}.")
+
+        return index
+
+    def save(self) -> None:
+        data = {
+            "end": self.end,
+            "head": file_head(self.log_file_path, self.end),
+            "days": self.days,
+            "untimed": self.untimed,
+        }
+        try:
+            with open(self.index_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(self.index_path + ".tmp", self.index_path)
+        except IOError as e:
+            print(f"Warning: could not write day index: {e}.")
+
+    def add(self, offset: int, timestamp: Optional[str]) -> None:
+        """
+        Register the line starting at `offset` if it is its day's latest, or
+        as untimed if it has no timestamp.
+        """
+        if not timestamp:
+            self.untimed.append(offset)
+        add_latest(self.days, offset, timestamp)
+
+    def update(self) -> bool:
+        """
+        Index the complete lines appended since the last update.
+        Returns True if anything new was indexed.
+        """
+        with open(self.log_file_path, 'rb') as f:
+            f.seek(self.end)
+            offset = self.end
+            for line in f:
+                # A partially written last line is left for the next update.
+                if not line.endswith(b'\n'):
+                    break
+                if line.strip():
+                    self.add(offset, line_timestamp(line))
+                offset += len(line)
+
+        updated = offset != self.end
+        self.end = offset
+        return updated
+
+    def iter_latest_lines(self, from_offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """
+        (offset, line) of the latest line of every day whose latest line
+        starts at or after `from_offset`, in log order.
+        """
+        offsets = sorted(offset for offset, _ in self.days.values() if offset >= from_offset)
+        with open(self.log_file_path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield offset, f.readline()
+
+    def iter_untimed_lines(self, from_offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """
+        (offset, line) of every line without a timestamp starting at or
+        after `from_offset`, in log order.
+        """
+        with open(self.log_file_path, 'rb') as f:
+            for offset in self.untimed:
+                if offset >= from_offset:
+                    f.seek(offset)
+                    yield offset, f.readline()
+
+
+def record_append(log_file_path: str, offset: int, line: str, timestamp: str) -> None:
+    """
+    Update the day index after `line` was appended to the log at `offset`.
+    """
+    record_appends(log_file_path, [(offset, line, timestamp)])
+
+
+def record_appends(log_file_path: str, appends: List[Tuple[int, str, str]]) -> None:
+    """
+    Update the day index after consecutive (offset, line, timestamp) appends.
+    """
+    index = DayIndex.load(log_file_path)
+    if index.end != appends[0][0]:
+        # Lines were appended without the index (or it is new): catch up first.
+        index.update()
+    else:
+        for offset, line, timestamp in appends:
+            index.add(offset, timestamp)
+            index.end = offset + len(line.encode('utf-8'))
+    index.save()
@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    """
+    View dates/datetimes as numbers so distances can be computed.
+    """
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("int64").astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: pick `max_points` indices that keep the
+    visual shape of the curve. First and last points are always kept.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    xf, yf = _as_float(x), y.astype(np.float64)
+    # Interior points split into max_points - 2 buckets.
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average of the next bucket (or the last point) as the third vertex.
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = xf[next_start:next_end].mean()
+        avg_y = yf[next_start:next_end].mean()
+
+        areas = np.abs(
+            (xf[selected] - avg_x) * (yf[start:end] - yf[selected])
+            - (xf[selected] - xf[start:end]) * (avg_y - yf[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def min_max_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Keep the minimum and maximum of each bucket, so spikes survive.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+
+    # Two points per bucket, plus the first and last points.
+    n_buckets = (max_points - 2) // 2
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    starts = edges[:-1]
+
+    y_min = starts + np.array([np.argmin(y[s:e]) for s, e in zip(edges[:-1], edges[1:])])
+    y_max = starts + np.array([np.argmax(y[s:e]) for s, e in zip(edges[:-1], edges[1:])])
+
+    return np.unique(np.concatenate([y_min, y_max, [0, n - 1]]))
+
+
+DOWNSAMPLERS = {
+    'lttb': lttb_indices,
+    'minmax': min_max_indices,
+}
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int = None, method: str = 'lttb'):
+    """
+    Reduce a line to at most `max_points` points. Returns (x, y).
+    """
+    if not max_points or len(x) <= max_points:
+        return x, y
+
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Choose from {list(DOWNSAMPLERS)}.")
+
+    indices = DOWNSAMPLERS[method](x, y, max_points)
+    return x[indices], y[indices]
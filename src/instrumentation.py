@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import functools
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional, Set
+from config.settings import METRICS_ENABLED, METRICS_FILE, METRICS_PROM_FILE
+
+# Shared with worker processes through the environment, so their records can
+# be attributed to the run that started them.
+RUN_ID_ENV = "RENSHUU_METRICS_RUN_ID"
+
+
+class StageRecord:
+    """
+    Measurements for one call of an instrumented stage. Stages can add what
+    only they know (bytes read or written, rows) while they run.
+    """
+
+    __slots__ = ("stage", "rows", "bytes_read", "bytes_written", "rss_start_mb", "peak_rss_mb")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.rows = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.rss_start_mb = None
+        self.peak_rss_mb = None
+
+
+class _NullRecord:
+    """
+    Stand-in returned by current_stage() when instrumentation is off.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+    rows = None
+    bytes_read = 0
+    bytes_written = 0
+
+
+_NULL_RECORD = _NullRecord()
+_current: ContextVar[Optional[StageRecord]] = ContextVar("renshuu_stage", default=None)
+_write_lock = threading.Lock()
+# Records inside track_peak_rss, in any thread, and the lock over the high-water mark.
+_active_records: Set[StageRecord] = set()
+_peak_lock = threading.Lock()
+_state = {"enabled": False, "metrics_file": None, "prom_file": None, "owner_pid": None}
+
+
+def _current_rss_mb() -> Optional[float]:
+    """
+    Resident memory of the process right now, or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _high_water_rss_mb() -> Optional[float]:
+    """
+    Peak resident memory of the process since the high-water mark was last reset.
+    """
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _reset_high_water() -> bool:
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def track_peak_rss(record: StageRecord) -> Iterator[StageRecord]:
+    """
+    Measure the resident memory of the block into `record`: `rss_start_mb`
+    and `peak_rss_mb`, the high-water mark reset on entry (None where /proc
+    does not allow it). Blocks may nest or run in several threads: every
+    reset first credits the peak so far to the blocks still running.
+    """
+    with _peak_lock:
+        record.rss_start_mb = _current_rss_mb()
+        peak = _high_water_rss_mb()
+        if peak is not None:
+            for active in _active_records:
+                active.peak_rss_mb = max(active.peak_rss_mb, peak)
+            if _reset_high_water():
+                record.peak_rss_mb = _high_water_rss_mb() or 0.0
+                _active_records.add(record)
+    try:
+        yield record
+    finally:
+        with _peak_lock:
+            if record in _active_records:
+                _active_records.discard(record)
+                record.peak_rss_mb = max(record.peak_rss_mb, _high_water_rss_mb() or 0.0)
+
+
+def _infer_rows(result) -> Optional[int]:
+    """
+    Row count of a stage's result: frames, dicts of frames or tuples of frames.
+    """
+    if hasattr(result, "height"):
+        return result.height
+    if isinstance(result, dict):
+        return sum(_infer_rows(value) or 0 for value in result.values())
+    if isinstance(result, tuple):
+        return sum(_infer_rows(value) or 0 for value in result)
+    return None
+
+
+def enable(metrics_file: str = None, prom_file: str = None) -> None:
+    """
+    Turn instrumentation on for this process and the workers it starts.
+    """
+    _state["enabled"] = True
+    _state["metrics_file"] = metrics_file or METRICS_FILE
+    _state["prom_file"] = prom_file or METRICS_PROM_FILE
+
+    os.environ["RENSHUU_METRICS"] = "1"
+    os.environ["RENSHUU_METRICS_FILE"] = _state["metrics_file"]
+    if _state["prom_file"]:
+        os.environ["RENSHUU_METRICS_PROM"] = _state["prom_file"]
+
+    # The process that starts a run owns it and writes the Prometheus file.
+    if RUN_ID_ENV not in os.environ:
+        os.environ[RUN_ID_ENV] = uuid.uuid4().hex
+        _state["owner_pid"] = os.getpid()
+        atexit.register(_write_prometheus_at_exit)
+
+
+def is_enabled() -> bool:
+    return _state["enabled"]
+
+
+def current_stage():
+    """
+    The record of the innermost running stage, or a no-op stand-in.
+    """
+    return _current.get() or _NULL_RECORD
+
+
+def _write_record(record: dict) -> None:
+    line = json.dumps(record) + "\n"
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(_state["metrics_file"])), exist_ok=True)
+            with open(_state["metrics_file"], 'a', encoding='utf-8') as f:
+                f.write(line)
+    except IOError as e:
+        print(f"Warning: could not write metrics: {e}.")
+
+
+def instrument(stage: str = None) -> Callable:
+    """
+    Decorator recording duration, rows, bytes and memory of each call: the
+    peak resident memory during the call and its change across the call
+    (nested stages included).
+    When instrumentation is off the wrapper only checks a flag.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = stage or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+
+            record = StageRecord(name)
+            token = _current.set(record)
+            start_time = datetime.now().isoformat()
+            start = time.perf_counter()
+            success = False
+            try:
+                with track_peak_rss(record):
+                    result = func(*args, **kwargs)
+                success = True
+                return result
+            finally:
+                duration = time.perf_counter() - start
+                rss_after = _current_rss_mb()
+                _current.reset(token)
+                rows = record.rows
+                if rows is None and success:
+                    rows = _infer_rows(result)
+                _write_record({
+                    "run_id": os.environ.get(RUN_ID_ENV),
+                    "pid": os.getpid(),
+                    "stage": name,
+                    "start": start_time,
+                    "duration_s": round(duration, 6),
+                    "rows": rows,
+                    "bytes_read": record.bytes_read,
+                    "bytes_written": record.bytes_written,
+                    "rss_delta_mb": (round(rss_after - record.rss_start_mb, 3)
+                                     if record.rss_start_mb is not None and rss_after is not None else None),
+                    "peak_rss_mb": (round(record.peak_rss_mb, 3)
+                                    if record.peak_rss_mb is not None else None),
+                    "success": success,
+                })
+
+        return wrapper
+    return decorator
+
+
+def write_prometheus(metrics_file: str, prom_file: str, run_id: str = None) -> None:
+    """
+    Aggregate the JSONL records of a run into a Prometheus textfile.
+    """
+    totals = {}
+    with open(metrics_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if run_id and record.get("run_id") != run_id:
+                continue
+            stage = totals.setdefault(record["stage"], {
+                "calls": 0, "failures": 0, "duration_s": 0.0, "rows": 0,
+                "bytes_read": 0, "bytes_written": 0, "rss_delta_mb": 0.0, "peak_rss_mb": 0.0,
+            })
+            stage["calls"] += 1
+            stage["failures"] += not record["success"]
+            stage["duration_s"] += record["duration_s"]
+            stage["rows"] += record["rows"] or 0
+            stage["bytes_read"] += record["bytes_read"]
+            stage["bytes_written"] += record["bytes_written"]
+            stage["rss_delta_mb"] = max(stage["rss_delta_mb"], record.get("rss_delta_mb") or 0.0)
+            stage["peak_rss_mb"] = max(stage["peak_rss_mb"], record.get("peak_rss_mb") or 0.0)
+
+    metrics = [
+        ("calls_total", "calls", "counter", "Number of calls"),
+        ("failures_total", "failures", "counter", "Number of failed calls"),
+        ("duration_seconds_total", "duration_s", "counter", "Total time spent"),
+        ("rows_total", "rows", "counter", "Rows processed"),
+        ("bytes_read_total", "bytes_read", "counter", "Bytes read"),
+        ("bytes_written_total", "bytes_written", "counter", "Bytes written"),
+        ("rss_growth_megabytes", "rss_delta_mb", "gauge", "Largest growth of resident memory across a call"),
+        ("peak_rss_megabytes", "peak_rss_mb", "gauge", "Peak resident memory during a call"),
+    ]
+    lines = []
+    for suffix, key, kind, help_text in metrics:
+        metric = f"renshuu_stage_{suffix}"
+        lines.append(f"# HELP {metric} {help_text} per stage.")
+        lines.append(f"# TYPE {metric} {kind}")
+        for stage, values in sorted(totals.items()):
+            lines.append(f'{metric}{{stage="{stage}"}} {values[key]}')
+
+    # Node exporter reads the file at any time, so replace it atomically.
+    with open(prom_file + ".tmp", 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(prom_file + ".tmp", prom_file)
+
+
+def _write_prometheus_at_exit() -> None:
+    if os.getpid() != _state["owner_pid"] or not _state["prom_file"]:
+        return
+    if not os.path.exists(_state["metrics_file"]):
+        return
+    try:
+        write_prometheus(_state["metrics_file"], _state["prom_file"], os.environ.get(RUN_ID_ENV))
+    except (IOError, KeyError) as e:
+        print(f"Warning: could not write Prometheus metrics: {e}.")
+
+
+if METRICS_ENABLED:
+    enable()
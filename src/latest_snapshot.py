@@ -0,0 +1,62 @@
+import os
+import json
+from typing import Dict, Any, Optional
+
+# The latest fetch's counters and progress, kept next to the log by the fetcher.
+LATEST_SNAPSHOT_SUFFIX = ".latest.json"
+
+
+def snapshot_record(data: Dict[str, Any], log_size: int) -> Optional[Dict[str, Any]]:
+    """
+    The snapshot of a fetched profile: its 'studied' counters and its
+    'level_progress_percs' flattened to one (category, level, percentage)
+    entry per level. None if the profile lacks either.
+    """
+    studied, progress = data.get("studied"), data.get("level_progress_percs")
+    if not isinstance(studied, dict) or not isinstance(progress, dict):
+        return None
+
+    return {
+        "fetch_timestamp": data["fetch_timestamp"],
+        "fetch_date": data["fetch_timestamp"][:10],
+        "studied": studied,
+        "progress": [
+            {"category": category, "level": level, "percentage": percentage}
+            for category, levels in progress.items() if isinstance(levels, dict)
+            for level, percentage in levels.items()
+        ],
+        # Size of the log once this fetch was logged, to detect later writes.
+        "log_size": log_size,
+    }
+
+
+def write_latest_snapshot(log_file_path: str, data: Dict[str, Any], log_size: int) -> None:
+    """
+    Atomically replace the latest snapshot of a log with that of `data`.
+    """
+    snapshot = snapshot_record(data, log_size)
+    if snapshot is None:
+        return
+
+    path = log_file_path + LATEST_SNAPSHOT_SUFFIX
+    try:
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+    except IOError as e:
+        print(f"Warning: could not write latest snapshot: {e}.")
+
+
+def read_latest_snapshot(log_file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    The latest snapshot of a log, or None if there is none or the log was
+    written to without updating it.
+    """
+    try:
+        with open(log_file_path + LATEST_SNAPSHOT_SUFFIX, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot["log_size"] != os.path.getsize(log_file_path):
+            return None
+        return snapshot
+    except (IOError, ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,217 @@
+import io
+import os
+import json
+import hashlib
+import polars as pl
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
+from src.instrumentation import current_stage
+from src.log_segments import LogLine
+from config.settings import INGEST_CHUNK_BYTES
+
+# Lines that cannot be loaded are moved aside next to the log.
+QUARANTINE_SUFFIX = ".quarantine.jsonl"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S%.f"
+
+# Columns every log record needs, with the type they must parse to.
+REQUIRED_COLUMNS = {"fetch_timestamp": pl.String, "studied": pl.Struct, "level_progress_percs": pl.Struct}
+REQUIRED_FIELDS = {"fetch_timestamp": str, "studied": dict, "level_progress_percs": dict}
+
+
+class LogFileLines:
+    """
+    The complete lines of a log file from an offset on, read lazily.
+    `end` is the offset just past the last line read so far.
+    """
+
+    def __init__(self, log_file_path: str, offset: int = 0):
+        self.log_file_path = log_file_path
+        self.source = os.path.basename(log_file_path)
+        self.end = offset
+
+    def __iter__(self) -> Iterator[LogLine]:
+        with open(self.log_file_path, 'rb') as f:
+            f.seek(self.end)
+            for line in f:
+                # Leave a partially written last line for the next run.
+                if not line.endswith(b'\n'):
+                    break
+                yield self.source, self.end, line
+                self.end += len(line)
+
+
+def line_chunks(lines: Iterable[LogLine], chunk_bytes: int) -> Iterator[List[LogLine]]:
+    """
+    Group non-blank lines into chunks of about `chunk_bytes`.
+    """
+    chunk, size = [], 0
+    for line in lines:
+        if not line[2].strip():
+            continue
+        chunk.append(line)
+        size += len(line[2])
+        if size >= chunk_bytes:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def line_error(line: bytes) -> Optional[str]:
+    """
+    Why a raw log line cannot be loaded, or None if it can.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return f"Invalid JSON: {e}"
+    if not isinstance(record, dict):
+        return "Not a JSON object"
+    for field, kind in REQUIRED_FIELDS.items():
+        if not isinstance(record.get(field), kind):
+            return f"Missing or invalid '{field}'"
+    return None
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class LogIngest:
+    """
+    Parses log lines into rows chunk by chunk, so memory stays bounded by the
+    chunk size plus what `reduce` keeps. Malformed lines and lines missing
+    required fields are appended to the quarantine file with their source
+    and offset, and loading carries on without them.
+    """
+
+    def __init__(self, log_file_path: str, chunk_bytes: int = None):
+        self.quarantine_path = log_file_path + QUARANTINE_SUFFIX
+        self.chunk_bytes = chunk_bytes or INGEST_CHUNK_BYTES
+        self.skipped: Set[Tuple[str, int]] = set()
+        self._known: Optional[Set[Tuple[str, int, str]]] = None
+
+    def _quarantine(self, source: str, offset: int, line: bytes, error: str) -> None:
+        """
+        Record a bad line, once per (source, offset, content) across runs:
+        after rotation the active log reuses its name and offsets.
+        """
+        if self._known is None:
+            self._known = set()
+            if os.path.exists(self.quarantine_path):
+                with open(self.quarantine_path, 'r', encoding='utf-8') as f:
+                    for entry in f:
+                        try:
+                            entry = json.loads(entry)
+                            self._known.add((entry["source"], entry["offset"], _text_digest(entry["line"])))
+                        except (ValueError, KeyError):
+                            continue
+
+        self.skipped.add((source, offset))
+        text = line.decode('utf-8', errors='replace').rstrip('\n')
+        key = (source, offset, _text_digest(text))
+        if key in self._known:
+            return
+        self._known.add(key)
+
+        entry = {
+            "source": source,
+            "offset": offset,
+            "error": error[:200],
+            "quarantined_at": datetime.now().isoformat(),
+            "line": text,
+        }
+        try:
+            with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except IOError as e:
+            print(f"Warning: could not quarantine log line at {source}:{offset}: {e}.")
+
+    def quarantine(self, lines: Iterable[LogLine]) -> None:
+        """
+        Quarantine lines known to be unusable without parsing them as rows.
+        """
+        for source, offset, line in lines:
+            self._quarantine(source, offset, line, line_error(line) or "Missing 'fetch_timestamp'")
+
+    @staticmethod
+    def _read_rows(data: bytes) -> Tuple[pl.DataFrame, Optional[pl.Series]]:
+        """
+        Parse NDJSON bytes and, per row, why it cannot be loaded (null if it
+        can). The reasons are None if the chunk as a whole does not parse to
+        the required schema.
+        """
+        try:
+            # Infer from every row: a category or level first seen late in a
+            # chunk would otherwise be dropped from the struct.
+            df = pl.read_ndjson(io.BytesIO(data), infer_schema_length=None)
+        except Exception:
+            return pl.DataFrame(), None
+        for name, dtype in REQUIRED_COLUMNS.items():
+            if name not in df.columns or df.schema[name].base_type() != dtype:
+                return df, None
+
+        timestamp = pl.col("fetch_timestamp").str.strptime(pl.Datetime, format=TIMESTAMP_FORMAT, strict=False)
+        errors = df.select(
+            pl.when(timestamp.is_null()).then(pl.lit("Invalid 'fetch_timestamp'"))
+            .when(pl.col("studied").is_null()).then(pl.lit("Missing 'studied'"))
+            .when(pl.col("level_progress_percs").is_null()).then(pl.lit("Missing 'level_progress_percs'"))
+            .otherwise(pl.lit(None, dtype=pl.String))
+        ).to_series()
+        return df, errors
+
+    def _parse_chunk(self, chunk: List[LogLine], resolve: Optional[Callable[[bytes], bytes]]) -> pl.DataFrame:
+        """
+        Parse one chunk, quarantining the lines that fail.
+        """
+        data = b''.join(line for _, _, line in chunk)
+        current_stage().bytes_read += len(data)
+        if resolve is not None:
+            data = resolve(data)
+        # Resolving keeps one line per input line, in order.
+        lines = [(source, offset, line) for (source, offset, _), line in zip(chunk, data.split(b'\n'))]
+
+        df, errors = self._read_rows(data)
+        if errors is None:
+            # Weed out the bad lines one by one, then parse the rest together.
+            kept = []
+            for source, offset, line in lines:
+                error = line_error(line)
+                if error is None:
+                    kept.append((source, offset, line))
+                else:
+                    self._quarantine(source, offset, line, error)
+            if not kept:
+                return pl.DataFrame()
+
+            lines = kept
+            df, errors = self._read_rows(b'\n'.join(line for _, _, line in lines) + b'\n')
+            if errors is None:
+                for source, offset, line in lines:
+                    self._quarantine(source, offset, line, "Chunk does not parse to the log schema")
+                return pl.DataFrame()
+
+        if errors.null_count() == len(errors):
+            return df
+        for (source, offset, line), error in zip(lines, errors):
+            if error is not None:
+                self._quarantine(source, offset, line, error)
+        return df.filter(errors.is_null())
+
+    def parse(self, lines: Iterable[LogLine],
+              resolve: Optional[Callable[[bytes], bytes]] = None,
+              reduce: Optional[Callable[[pl.DataFrame], pl.DataFrame]] = None) -> pl.DataFrame:
+        """
+        Parse NDJSON log lines in chunks. `resolve` rewrites each chunk's raw
+        bytes before parsing (one line out per line in); `reduce` shrinks the
+        rows accumulated so far after each chunk.
+        """
+        df = pl.DataFrame()
+        for chunk in line_chunks(lines, self.chunk_bytes):
+            df_chunk = self._parse_chunk(chunk, resolve)
+            if df_chunk.is_empty():
+                continue
+            df = pl.concat([df, df_chunk], how="diagonal_relaxed") if not df.is_empty() else df_chunk
+            if reduce is not None:
+                df = reduce(df)
+        return df
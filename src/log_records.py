@@ -0,0 +1,249 @@
+import os
+import json
+import hashlib
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+# Sidecar remembering the last record written by the fetcher.
+FETCH_STATE_SUFFIX = ".fetch_state.json"
+
+# How repeated profiles are written: every fetch in full ('off'), not at all
+# within a day ('skip'), as a small marker ('marker'), or with changes stored
+# as a delta against the last full record ('delta').
+DEDUP_MODES = ("off", "skip", "marker", "delta")
+
+# Encoded records point at the byte offset of their full base record.
+BASE_KEY = "_base"
+DELTA_KEY = "_delta"
+REMOVED_KEY = "_removed"
+UNCHANGED_KEY = "_unchanged"
+BASE_MARKER = b'"_base"'
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    """
+    Hash a profile, ignoring when it was fetched.
+    """
+    content = {key: value for key, value in data.items() if key != "fetch_timestamp"}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def diff(base: Dict[str, Any], new: Dict[str, Any],
+         path: Tuple[str, ...] = ()) -> Tuple[Dict[str, Any], List[List[str]]]:
+    """
+    Fields of `new` that differ from `base`, nested like the profile, and the
+    paths of fields `new` no longer has.
+    """
+    changed, removed = {}, []
+    for key, value in new.items():
+        if key not in base:
+            changed[key] = value
+        elif isinstance(value, dict) and isinstance(base[key], dict):
+            nested, nested_removed = diff(base[key], value, path + (key,))
+            if nested:
+                changed[key] = nested
+            removed.extend(nested_removed)
+        elif value != base[key]:
+            changed[key] = value
+
+    removed.extend([list(path + (key,)) for key in base if key not in new])
+    return changed, removed
+
+
+def apply_delta(base: Dict[str, Any], delta: Dict[str, Any],
+                removed: List[List[str]] = ()) -> Dict[str, Any]:
+    """
+    Rebuild a full record from its base and the output of diff().
+    """
+    record = dict(base)
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(record.get(key), dict):
+            record[key] = apply_delta(record[key], value)
+        else:
+            record[key] = value
+
+    for path in removed:
+        parent = record
+        for key in path[:-1]:
+            # Copy on the way down so the shared base is left untouched.
+            parent[key] = dict(parent[key])
+            parent = parent[key]
+        parent.pop(path[-1], None)
+    return record
+
+
+def read_record(log_file_path: str, offset: int) -> Dict[str, Any]:
+    """
+    Parse the log line starting at `offset`.
+    """
+    with open(log_file_path, 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+
+def resolve_records(log_file_path: str, data: bytes,
+                    read_base: Callable[[int], Dict[str, Any]] = None) -> bytes:
+    """
+    Rewrite marker and delta lines of `data` (NDJSON read from the log) as
+    full records. Lines that are already full are passed through untouched.
+    Bases are read from the log file, or with `read_base` (as for a
+    compressed segment).
+    """
+    if BASE_MARKER not in data:
+        return data
+
+    bases = {}
+    lines = []
+    for line in data.splitlines(keepends=True):
+        if BASE_MARKER not in line:
+            lines.append(line)
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Left for the NDJSON reader to report.
+            lines.append(line)
+            continue
+        if BASE_KEY not in record:
+            lines.append(line)
+            continue
+
+        offset = record[BASE_KEY]
+        try:
+            if offset not in bases:
+                if read_base is None:
+                    bases[offset] = read_record(log_file_path, offset)
+                else:
+                    bases[offset] = read_base(offset)
+        except (IOError, ValueError) as e:
+            # Left as is, so the reader quarantines it.
+            print(f"Log record with unreadable base at byte {offset}: {e}.")
+            lines.append(line)
+            continue
+
+        full = apply_delta(bases[offset], record.get(DELTA_KEY, {}), record.get(REMOVED_KEY, []))
+        full["fetch_timestamp"] = record["fetch_timestamp"]
+        lines.append((json.dumps(full, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    return b''.join(lines)
+
+
+def has_encoded_records(log_file_path: str) -> bool:
+    """
+    Whether the fetcher ever wrote marker or delta records to this log.
+    """
+    return FetchState.load(log_file_path).encoded
+
+
+class FetchState:
+    """
+    What the fetcher last appended to a log: the profile's hash and day, and
+    the offset and hash of the last full record, valid while the log ends
+    where the fetcher left it.
+    """
+
+    def __init__(self, log_file_path: str):
+        self.log_file_path = log_file_path
+        self.state_path = log_file_path + FETCH_STATE_SUFFIX
+        self.end = None
+        self.hash = None
+        self.day = None
+        self.base = None
+        self.base_size = None
+        self.base_hash = None
+        self.encoded = False
+
+    @classmethod
+    def load(cls, log_file_path: str) -> "FetchState":
+        state = cls(log_file_path)
+        if not os.path.exists(state.state_path):
+            return state
+
+        try:
+            with open(state.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            state.encoded = data.get("encoded", False)
+
+            # Anything else appended to (or replacing) the log invalidates the rest.
+            size = os.path.getsize(log_file_path) if os.path.exists(log_file_path) else 0
+            if size == data["end"]:
+                state.end = data["end"]
+                state.hash = data["hash"]
+                state.day = data["day"]
+                state.base = data["base"]
+                state.base_size = data["base_size"]
+                state.base_hash = data["base_hash"]
+        except (IOError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable fetch state: {e}.")
+
+        return state
+
+    def save(self) -> None:
+        data = {
+            "end": self.end,
+            "hash": self.hash,
+            "day": self.day,
+            "base": self.base,
+            "base_size": self.base_size,
+            "base_hash": self.base_hash,
+            "encoded": self.encoded,
+        }
+        try:
+            with open(self.state_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(self.state_path + ".tmp", self.state_path)
+        except IOError as e:
+            print(f"Warning: could not write fetch state: {e}.")
+
+    def encode(self, data: Dict[str, Any], mode: str, max_delta_ratio: float,
+               pending: Dict[int, Dict[str, Any]] = None) -> Optional[str]:
+        """
+        The log line to append for `data` (which has its 'fetch_timestamp'),
+        or None if nothing needs to be written. `pending` holds full records
+        encoded at their offsets but not yet written to the log.
+        """
+        timestamp = data["fetch_timestamp"]
+        new_hash = content_hash(data)
+
+        if mode == "skip" and self.hash == new_hash and self.day == timestamp[:10]:
+            return None
+
+        record = None
+        if mode in ("marker", "delta") and self.base is not None and self.base_hash == new_hash:
+            record = {BASE_KEY: self.base, UNCHANGED_KEY: True}
+        elif mode == "delta" and self.base is not None:
+            try:
+                if pending and self.base in pending:
+                    base = dict(pending[self.base])
+                else:
+                    base = read_record(self.log_file_path, self.base)
+                base.pop("fetch_timestamp", None)
+                changed, removed = diff(base, {k: v for k, v in data.items() if k != "fetch_timestamp"})
+                record = {BASE_KEY: self.base, DELTA_KEY: changed}
+                if removed:
+                    record[REMOVED_KEY] = removed
+            except (IOError, ValueError) as e:
+                print(f"Could not read base record, writing a full one: {e}.")
+
+        if record is not None:
+            # The timestamp goes last, where the day index looks for it.
+            record["fetch_timestamp"] = timestamp
+            line = json.dumps(record, ensure_ascii=False) + '\n'
+            # Deltas that grow close to a full record start a new base instead.
+            if UNCHANGED_KEY in record or len(line.encode('utf-8')) <= max_delta_ratio * self.base_size:
+                return line
+
+        return json.dumps(data, ensure_ascii=False) + '\n'
+
+    def record_written(self, data: Dict[str, Any], offset: int, line: str) -> None:
+        """
+        Remember the line just appended at `offset` for `data`.
+        """
+        size = len(line.encode('utf-8'))
+        self.hash = content_hash(data)
+        if line.startswith('{"' + BASE_KEY + '"'):
+            self.encoded = True
+        else:
+            self.base, self.base_size, self.base_hash = offset, size, self.hash
+        self.end = offset + size
+        self.day = data["fetch_timestamp"][:10]
@@ -0,0 +1,270 @@
+import io
+import os
+import gzip
+import json
+import shutil
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Tuple
+from src.day_index import DAY_INDEX_SUFFIX, HEAD_BYTES, file_head, head_digest, line_timestamp
+from src.log_records import BASE_MARKER, FetchState, resolve_records
+from config.settings import LOG_ROTATION, SEGMENT_MAX_BYTES, SEGMENT_COMPRESSION, SEGMENT_READ_WORKERS
+
+# Closed segments live next to the active log, listed in a manifest.
+SEGMENTS_SUFFIX = ".segments"
+SEGMENTS_MANIFEST = "_segments.json"
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Where a reader stopped: closed segments fully read, then a byte offset in
+# the next file (the active log once all segments are read).
+LogPosition = Tuple[int, int]
+
+# A raw log line with the file it came from and its byte offset there.
+LogLine = Tuple[str, int, bytes]
+
+
+def _compress_file(source_path: str, target_path: str, compression: str) -> None:
+    """
+    Compress a file into another, a block at a time.
+    """
+    with open(source_path, 'rb') as source:
+        if compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("SEGMENT_COMPRESSION = 'zstd' needs the zstandard package.")
+            with open(target_path, 'wb') as target:
+                zstandard.ZstdCompressor().copy_stream(source, target)
+        else:
+            with gzip.open(target_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+
+
+def _open_segment(path: str) -> BinaryIO:
+    """
+    Open a compressed segment for streaming reads of its decompressed bytes.
+    """
+    if path.endswith(COMPRESSION_EXTENSIONS["zstd"]):
+        import zstandard
+        # Buffered, so the decompressed stream can be read line by line.
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    return gzip.open(path, 'rb')
+
+
+def _segment_lines(path: str) -> Iterator[Tuple[int, bytes]]:
+    """
+    (offset, line) of every complete line of a segment, decompressed as read.
+    """
+    with _open_segment(path) as f:
+        offset = 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            yield offset, line
+            offset += len(line)
+
+
+def _segment_record(path: str, offset: int) -> Dict[str, Any]:
+    """
+    Parse the segment line starting at `offset`.
+    """
+    for line_offset, line in _segment_lines(path):
+        if line_offset == offset:
+            return json.loads(line)
+        if line_offset > offset:
+            break
+    raise ValueError(f"no line starts at byte {offset}")
+
+
+class LogSegments:
+    """
+    Compressed, closed segments of a log that rolls over by month or size.
+    The active log keeps its path; closed ones are read back transparently.
+    """
+
+    def __init__(self, log_file_path: str):
+        self.log_file_path = log_file_path
+        self.segments_dir = log_file_path + SEGMENTS_SUFFIX
+        self.manifest_path = os.path.join(self.segments_dir, SEGMENTS_MANIFEST)
+        self.entries: List[Dict[str, Any]] = []
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _segment_path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.segments_dir, entry["file"])
+
+    def end_position(self) -> LogPosition:
+        """
+        The position just past everything currently in the log.
+        """
+        size = os.path.getsize(self.log_file_path) if os.path.exists(self.log_file_path) else 0
+        return len(self.entries), size
+
+    def head(self, position: LogPosition) -> str:
+        """
+        Fingerprint of the file `position` points into, up to its offset.
+        """
+        segment, offset = position
+        if segment == len(self.entries):
+            return file_head(self.log_file_path, offset)
+        # A segment is the active log of an earlier reader, compressed as is.
+        with _open_segment(self._segment_path(self.entries[segment])) as f:
+            return head_digest(f.read(min(offset, HEAD_BYTES)))
+
+    def is_valid(self, position: LogPosition, head: str) -> bool:
+        """
+        Whether `position` (with its head fingerprint) still points into this log.
+        """
+        segment, offset = position
+        if segment > len(self.entries):
+            return False
+        if segment == len(self.entries):
+            if not os.path.exists(self.log_file_path) or os.path.getsize(self.log_file_path) < offset:
+                return False
+        elif self.entries[segment]["bytes"] < offset:
+            return False
+        return self.head(position) == head
+
+    def should_rotate(self, timestamp: str) -> bool:
+        """
+        Whether the active log should be closed before appending a fetch
+        made at `timestamp`.
+        """
+        if not LOG_ROTATION or not os.path.exists(self.log_file_path):
+            return False
+
+        if LOG_ROTATION == "size":
+            return os.path.getsize(self.log_file_path) >= SEGMENT_MAX_BYTES
+
+        with open(self.log_file_path, 'rb') as f:
+            first_line = f.readline()
+        first_timestamp = line_timestamp(first_line) if first_line.endswith(b'\n') else None
+        return first_timestamp is not None and first_timestamp[:7] != timestamp[:7]
+
+    def rotate(self) -> Optional[Dict[str, Any]]:
+        """
+        Compress the active log into a new closed segment and start it afresh.
+        Returns the segment's manifest entry, or None if there was nothing to close.
+        """
+        size = os.path.getsize(self.log_file_path)
+        if not size:
+            return None
+
+        min_day = max_day = None
+        with open(self.log_file_path, 'rb') as f:
+            for line in f:
+                timestamp = line_timestamp(line) if line.strip() else None
+                if timestamp:
+                    day = timestamp[:10]
+                    min_day = day if min_day is None else min(min_day, day)
+                    max_day = day if max_day is None else max(max_day, day)
+        extension = COMPRESSION_EXTENSIONS[SEGMENT_COMPRESSION]
+        stem = os.path.splitext(os.path.basename(self.log_file_path))[0]
+        entry = {
+            "file": f"{stem}.{len(self.entries):04d}.jsonl{extension}",
+            "min_date": min_day,
+            "max_date": max_day,
+            "bytes": size,
+        }
+
+        os.makedirs(self.segments_dir, exist_ok=True)
+        segment_path = self._segment_path(entry)
+        _compress_file(self.log_file_path, segment_path + ".tmp", SEGMENT_COMPRESSION)
+        os.replace(segment_path + ".tmp", segment_path)
+
+        # Until the active log is emptied its lines exist twice, which
+        # deduplication by date absorbs if we stop in between.
+        self.entries.append(entry)
+        with open(self.manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+        open(self.log_file_path, 'w').close()
+
+        # Sidecars describing the active log start over with it.
+        if os.path.exists(self.log_file_path + DAY_INDEX_SUFFIX):
+            os.remove(self.log_file_path + DAY_INDEX_SUFFIX)
+        state = FetchState.load(self.log_file_path)
+        fresh_state = FetchState(self.log_file_path)
+        fresh_state.encoded = state.encoded
+        fresh_state.save()
+
+        print(f"Rotated log into segment '{entry['file']}'.")
+        return entry
+
+    def _read_segment(self, entry: Dict[str, Any], from_offset: int,
+                      start_day: Optional[str], end_day: Optional[str],
+                      latest_only: bool) -> Iterator[LogLine]:
+        """
+        The latest line of each day of a segment (or every line), as full
+        NDJSON records, decompressing the segment as it is read.
+        """
+        path = self._segment_path(entry)
+        source = os.path.basename(path)
+        in_range = lambda day: (start_day is None or day >= start_day) and (end_day is None or day <= end_day)
+
+        def resolve(line: bytes, base: Optional[Tuple[int, bytes]]) -> bytes:
+            # Encoded lines point at the last full record before them, kept
+            # while streaming; any other base is looked up in the segment.
+            read_base = lambda offset: (json.loads(base[1]) if base is not None and base[0] == offset
+                                        else _segment_record(path, offset))
+            return resolve_records(self.log_file_path, line, read_base)
+
+        # Latest (offset, timestamp, line, base) of each day.
+        days: Dict[str, Tuple[int, str, bytes, Optional[Tuple[int, bytes]]]] = {}
+        base = None
+        for offset, line in _segment_lines(path):
+            if not line.strip():
+                continue
+            timestamp = line_timestamp(line)
+            encoded = BASE_MARKER in line
+            if latest_only:
+                if timestamp and (timestamp[:10] not in days or timestamp >= days[timestamp[:10]][1]):
+                    days[timestamp[:10]] = (offset, timestamp, line, base if encoded else None)
+            elif offset >= from_offset and (not timestamp or in_range(timestamp[:10])):
+                yield source, offset, resolve(line, base if encoded else None)
+            if timestamp and not encoded:
+                base = (offset, line)
+
+        for offset, timestamp, line, line_base in sorted(days.values()):
+            if offset >= from_offset and in_range(timestamp[:10]):
+                yield source, offset, resolve(line, line_base)
+
+    def read(self, position: LogPosition = (0, 0),
+             start_date: Optional[date] = None, end_date: Optional[date] = None,
+             latest_only: bool = True) -> Iterator[LogLine]:
+        """
+        The latest line of each day (or every line, without `latest_only`) in
+        the closed segments from `position` on, skipping segments outside
+        [start_date, end_date], with the segment and offset each came from.
+        Segments are decompressed as they are read: in parallel for the
+        latest lines (a few per day), one at a time for every line, so
+        memory stays bounded either way.
+        """
+        segment, offset = position
+        start_day = start_date.isoformat() if start_date else None
+        end_day = end_date.isoformat() if end_date else None
+
+        tasks = []
+        for index in range(segment, len(self.entries)):
+            entry = self.entries[index]
+            if entry["max_date"] is None:
+                continue
+            if (start_day and entry["max_date"] < start_day) or (end_day and entry["min_date"] > end_day):
+                continue
+            tasks.append((entry, offset if index == segment else 0, start_day, end_day, latest_only))
+
+        if not tasks:
+            return
+        if not latest_only:
+            for task in tasks:
+                yield from self._read_segment(*task)
+            return
+        with ThreadPoolExecutor(max_workers=min(len(tasks), SEGMENT_READ_WORKERS)) as executor:
+            for lines in executor.map(lambda task: list(self._read_segment(*task)), tasks):
+                yield from lines
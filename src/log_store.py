@@ -0,0 +1,218 @@
+import os
+import glob
+import json
+import shutil
+import polars as pl
+from typing import Dict, List, Optional
+from src.data_processor import RenshuuDataProcessor
+from src.instrumentation import instrument
+from src.log_segments import LogSegments
+from config.settings import CATEGORIES, LEVELS
+
+# The compacted store lives next to the log it was built from.
+STORE_SUFFIX = ".store"
+STORE_META_FILE = "_meta.json"
+
+
+class RenshuuLogStore:
+    """
+    Columnar, month-partitioned Parquet store of flattened daily log rows.
+    The JSONL log stays the source of truth; the store only caches what has
+    already been compacted from it.
+    """
+
+    def __init__(self, log_file_path: str, store_dir: str = None):
+        self.log_file_path = log_file_path
+        self.store_dir = store_dir or log_file_path + STORE_SUFFIX
+        self.meta_path = os.path.join(self.store_dir, STORE_META_FILE)
+
+    @staticmethod
+    def progress_columns(progress_schema: pl.Struct = None) -> Dict[str, List[str]]:
+        """
+        The flattened column of each (category, level) in a
+        `level_progress_percs` struct, or of the configured ones.
+        """
+        if progress_schema is None:
+            return {f"{category}_{level}": [category, level] for category in CATEGORIES for level in LEVELS}
+        return {
+            f"{category.name}_{level.name}": [category.name, level.name]
+            for category in progress_schema.fields
+            for level in category.dtype.fields
+        }
+
+    @staticmethod
+    def flatten_rows(df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Flatten parsed log rows into daily metric and progress columns.
+        """
+        studied_fields = [field.name for field in df.schema["studied"].fields]
+
+        expressions = [pl.col("fetch_date"), pl.col("full_timestamp")]
+        for field in studied_fields:
+            expressions.append(
+                pl.col("studied").struct.field(field)
+                    .alias(field.replace("today_", "daily_", 1))
+            )
+        for column, (category, level) in RenshuuLogStore.progress_columns(df.schema["level_progress_percs"]).items():
+            expressions.append(
+                pl.col("level_progress_percs").struct.field(category).struct.field(level).alias(column)
+            )
+
+        return df.select(expressions)
+
+    @staticmethod
+    def restructure_rows(df_flat: pl.DataFrame, progress_columns: Dict[str, List[str]] = None) -> pl.DataFrame:
+        """
+        Rebuild the nested `studied` and `level_progress_percs` columns from
+        flattened rows, so the processor's extract methods can consume them.
+        Only the `progress_columns` (by default the configured categories
+        and levels) go back under `level_progress_percs`; any other column
+        is a `studied` field and goes back there under its own name.
+        """
+        progress_columns = progress_columns or RenshuuLogStore.progress_columns()
+        studied_cols = [
+            col for col in df_flat.columns
+            if col not in progress_columns and col not in ("fetch_date", "full_timestamp")
+        ]
+
+        # Group 'vocab_n5', 'vocab_n4', ... back under their category.
+        categories = {}
+        for col in df_flat.columns:
+            if col in progress_columns:
+                category, level = progress_columns[col]
+                categories.setdefault(category, []).append(pl.col(col).alias(level))
+
+        return df_flat.select([
+            pl.col("fetch_date"),
+            pl.col("full_timestamp"),
+            pl.struct([
+                pl.col(col).alias(col.replace("daily_", "today_", 1)) for col in studied_cols
+            ]).alias("studied"),
+            pl.struct([
+                pl.struct(levels).alias(category) for category, levels in categories.items()
+            ]).alias("level_progress_percs"),
+        ])
+
+    def _read_meta(self) -> Optional[dict]:
+        """
+        Return the store metadata if the store still matches the log.
+        """
+        if not (os.path.exists(self.meta_path) and os.path.exists(self.log_file_path)):
+            return None
+
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable store metadata: {e}.")
+            return None
+
+        if "progress_columns" not in meta:
+            # Without it, progress columns cannot be told from other fields.
+            print(f"Store '{self.store_dir}' predates its current format and is rebuilt on the next compaction.")
+            return None
+
+        position = (meta.get("segments", 0), meta["offset"])
+        if not LogSegments(self.log_file_path).is_valid(position, meta["head"]):
+            print(f"Log file changed since it was compacted into '{self.store_dir}'.")
+            return None
+
+        return meta
+
+    def _partition_path(self, month: str) -> str:
+        return os.path.join(self.store_dir, f"month={month}", "part.parquet")
+
+    @instrument()
+    def compact(self) -> bool:
+        """
+        Roll the uncompacted JSONL tail into the month partitions it touches.
+        Returns True if successful.
+        """
+        if not os.path.exists(self.log_file_path):
+            print(f"Error: Log file '{self.log_file_path}' not found.")
+            return False
+
+        meta = self._read_meta()
+        if meta is None and os.path.exists(self.store_dir):
+            # Stale store: rebuild it from the whole log.
+            shutil.rmtree(self.store_dir)
+        position = (meta.get("segments", 0), meta["offset"]) if meta else (0, 0)
+
+        try:
+            df_tail, new_position = RenshuuDataProcessor._read_log_since(self.log_file_path, position)
+            if df_tail.is_empty():
+                print("Store is already up to date.")
+                return True
+
+            df_flat = self.flatten_rows(
+                RenshuuDataProcessor._add_fetch_dates(df_tail)
+            ).with_columns(
+                pl.col("fetch_date").dt.strftime("%Y-%m").alias("month")
+            )
+
+            for (month,), df_month in df_flat.partition_by("month", as_dict=True).items():
+                partition_path = self._partition_path(month)
+                df_month = df_month.drop("month")
+
+                if os.path.exists(partition_path):
+                    df_month = pl.concat(
+                        [pl.read_parquet(partition_path), df_month], how="diagonal_relaxed"
+                    )
+
+                os.makedirs(os.path.dirname(partition_path), exist_ok=True)
+                RenshuuDataProcessor._deduplicate_by_date(df_month).write_parquet(
+                    partition_path + ".tmp"
+                )
+                os.replace(partition_path + ".tmp", partition_path)
+
+            # Which columns hold progress, for restructuring them on load.
+            progress_columns = meta["progress_columns"] if meta else {}
+            progress_columns.update(self.progress_columns(df_tail.schema["level_progress_percs"]))
+            meta = {
+                "segments": new_position[0],
+                "offset": new_position[1],
+                "head": LogSegments(self.log_file_path).head(new_position),
+                "progress_columns": progress_columns,
+            }
+            with open(self.meta_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+
+            print(f"Compacted {len(df_tail)} log lines into '{self.store_dir}'.")
+            return True
+
+        except Exception as e:
+            print(f"Error compacting log: {e}.")
+            return False
+
+    @instrument()
+    def load_deduplicated(self) -> Optional[pl.DataFrame]:
+        """
+        Load deduplicated daily rows from the store plus the JSONL tail that
+        has not been compacted yet. Returns None if there is no valid store.
+        """
+        meta = self._read_meta()
+        if meta is None:
+            return None
+
+        # Months compacted after a new category or level appeared have more
+        # columns than earlier ones, so read them one by one and align them.
+        df_flat = pl.concat([
+            pl.read_parquet(path, hive_partitioning=False)
+            for path in sorted(glob.glob(os.path.join(self.store_dir, "month=*", "part.parquet")))
+        ], how="diagonal_relaxed")
+
+        progress_columns = meta["progress_columns"]
+        df_tail, _ = RenshuuDataProcessor._read_log_since(
+            self.log_file_path, (meta.get("segments", 0), meta["offset"])
+        )
+        if not df_tail.is_empty():
+            progress_columns.update(self.progress_columns(df_tail.schema["level_progress_percs"]))
+            df_tail = self.flatten_rows(RenshuuDataProcessor._add_fetch_dates(df_tail))
+            df_flat = pl.concat([df_flat, df_tail], how="diagonal_relaxed")
+
+        deduplicated_df = self.restructure_rows(
+            RenshuuDataProcessor._deduplicate_by_date(df_flat), progress_columns
+        )
+        print(f"Successfully loaded {len(deduplicated_df)} daily entries from the store.")
+        return deduplicated_df
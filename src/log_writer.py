@@ -0,0 +1,208 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+from src.day_index import record_appends
+from src.latest_snapshot import write_latest_snapshot
+from src.log_records import FetchState, DEDUP_MODES
+from src.log_segments import LogSegments
+from config.settings import (
+    FETCH_DEDUP_MODE, FETCH_DELTA_MAX_RATIO,
+    LOG_FSYNC, LOG_GROUP_COMMIT_RECORDS, LOG_GROUP_COMMIT_DELAY
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialised within this process.
+    fcntl = None
+
+# Advisory lock file next to the log; the log itself is replaced on rotation.
+LOCK_SUFFIX = ".lock"
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def log_lock(log_file_path: str) -> Iterator[None]:
+    """
+    Hold the exclusive append lock of a log, across threads and processes.
+    """
+    lock_path = log_file_path + LOCK_SUFFIX
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(os.path.abspath(lock_path), threading.Lock())
+
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor releases the lock.
+            os.close(fd)
+
+
+def write_all(fd: int, payload: bytes) -> None:
+    """
+    Write `payload` in one call, looping only if the OS writes it partially.
+    """
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class LogWriter:
+    """
+    Appends profiles to a JSONL log under its lock: rotation, dedup encoding
+    and sidecar updates (fetch state, day index, latest snapshot) happen
+    while the lock is held, and the lines of a batch reach the log as a
+    single write, so concurrent writers never interleave partial lines.
+    """
+
+    def __init__(self, log_file_path: str, dedup_mode: str = None, fsync: bool = None):
+        self.log_file_path = log_file_path
+        self.dedup_mode = dedup_mode or FETCH_DEDUP_MODE
+        self.fsync = LOG_FSYNC if fsync is None else fsync
+
+    def append(self, records: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Append profiles (each with its 'fetch_timestamp'), in order.
+        Returns the line written for each, or None for those the dedup mode
+        skipped. Raises IOError if the log cannot be written.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_file_path)), exist_ok=True)
+        with log_lock(self.log_file_path):
+            segments = LogSegments(self.log_file_path)
+            if segments.should_rotate(records[0]["fetch_timestamp"]):
+                segments.rotate()
+            offset = os.path.getsize(self.log_file_path) if os.path.exists(self.log_file_path) else 0
+
+            state = FetchState.load(self.log_file_path) if self.dedup_mode != 'off' else None
+            # Full records of this batch, for deltas against a base not yet written.
+            pending = {}
+            lines, appends = [], []
+            for data in records:
+                if state is None:
+                    line = json.dumps(data, ensure_ascii=False) + '\n'
+                else:
+                    line = state.encode(data, self.dedup_mode, FETCH_DELTA_MAX_RATIO, pending)
+                    if line is None:
+                        lines.append(None)
+                        continue
+                    state.record_written(data, offset, line)
+                    if state.base == offset:
+                        pending[offset] = data
+
+                lines.append(line)
+                appends.append((offset, line, data["fetch_timestamp"]))
+                offset += len(line.encode('utf-8'))
+
+            if not appends:
+                write_latest_snapshot(self.log_file_path, records[-1], offset)
+                return lines
+
+            fd = os.open(self.log_file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                write_all(fd, ''.join(line for _, line, _ in appends).encode('utf-8'))
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            if state is not None:
+                state.save()
+            # Point the day index at these fetches, the latest of their day.
+            record_appends(self.log_file_path, appends)
+            write_latest_snapshot(self.log_file_path, records[-1], offset)
+
+        return lines
+
+
+class _Batch:
+    """
+    Records waiting for one group commit, and its outcome.
+    """
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self.lines: List[Optional[str]] = []
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class GroupCommitLog:
+    """
+    Lets concurrent fetchers share logs without paying one write and fsync
+    per record. Each append waits until its record is committed: the caller
+    filling a batch commits it at once, and otherwise the first caller whose
+    wait exceeds `max_delay` commits whatever has gathered by then.
+    """
+
+    def __init__(self, dedup_mode: str = None, max_records: int = None,
+                 max_delay: float = None, fsync: bool = None):
+        self.dedup_mode = dedup_mode or FETCH_DEDUP_MODE
+        self.max_records = max_records or LOG_GROUP_COMMIT_RECORDS
+        self.max_delay = LOG_GROUP_COMMIT_DELAY if max_delay is None else max_delay
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.batches: Dict[str, _Batch] = {}
+
+        if self.dedup_mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{self.dedup_mode}', expected one of {DEDUP_MODES}.")
+
+    def _take(self, log_file_path: str, batch: _Batch) -> bool:
+        """
+        Claim `batch` for committing if it is still the one gathering records.
+        """
+        with self.lock:
+            if self.batches.get(log_file_path) is not batch:
+                return False
+            del self.batches[log_file_path]
+            return True
+
+    def _commit(self, log_file_path: str, batch: _Batch) -> None:
+        try:
+            batch.lines = LogWriter(log_file_path, self.dedup_mode, self.fsync).append(batch.records)
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    def append(self, log_file_path: str, data: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue a profile (with its 'fetch_timestamp') and wait for its commit.
+        Returns its log line, or None if the dedup mode skipped it. Raises
+        the commit's error if the batch could not be written.
+        """
+        with self.lock:
+            batch = self.batches.setdefault(log_file_path, _Batch())
+            position = len(batch.records)
+            batch.records.append(data)
+            full = len(batch.records) >= self.max_records
+            if full:
+                del self.batches[log_file_path]
+
+        if full:
+            self._commit(log_file_path, batch)
+        elif not batch.done.wait(self.max_delay):
+            if self._take(log_file_path, batch):
+                self._commit(log_file_path, batch)
+            else:
+                batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.lines[position]
+
+    def flush(self) -> None:
+        """
+        Commit every batch still gathering records.
+        """
+        with self.lock:
+            batches, self.batches = self.batches, {}
+        for log_file_path, batch in batches.items():
+            self._commit(log_file_path, batch)
@@ -0,0 +1,10 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def spawn_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    A process pool whose workers start as fresh interpreters: Polars' thread
+    pool does not survive fork(), so forked workers can deadlock.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
@@ -0,0 +1,271 @@
+import os
+import io
+import json
+import hashlib
+import threading
+import polars as pl
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Hashable, Tuple
+from src.data_processor import RenshuuDataProcessor, load_and_process_data
+from src.latest_snapshot import read_latest_snapshot
+from src.log_segments import LogSegments
+from src.rollups import RenshuuRollups, ROLLUP_TABLES, ROLLUPS_SUFFIX, ROLLUPS_STATE_FILE
+from config.settings import LOG_FILE, PLOTS_DIR, SERVER_HOST, SERVER_PORT, SERVER_RESPONSE_CACHE
+
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.file"
+PLOT_CONTENT_TYPES = {".png": "image/png", ".svg": "image/svg+xml", ".pdf": "application/pdf"}
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class RenshuuQueryServer:
+    """
+    Read-only HTTP service over the processed metrics and rendered plots.
+    Processed frames are kept in memory and reloaded when the log changes;
+    responses carry ETags so unchanged polls are answered with 304.
+    """
+
+    def __init__(self, log_file_path: str = None, plots_dir: str = None,
+                 host: str = None, port: int = None):
+        self.log_file_path = log_file_path or LOG_FILE
+        self.plots_dir = plots_dir or PLOTS_DIR
+        self.lock = threading.Lock()
+        self.version = None
+        self.frames = None
+        self.responses: "OrderedDict[Hashable, Tuple[str, bytes, str]]" = OrderedDict()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self)
+
+        self.httpd = ThreadingHTTPServer((host or SERVER_HOST, SERVER_PORT if port is None else port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _log_version(self) -> str:
+        """
+        Cheap fingerprint of the log: size and mtime of the active file, the
+        segment manifest and the rollup state.
+        """
+        parts = []
+        rollups_state = os.path.join(self.log_file_path + ROLLUPS_SUFFIX, ROLLUPS_STATE_FILE)
+        for path in (self.log_file_path, LogSegments(self.log_file_path).manifest_path, rollups_state):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                parts.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+        return ":".join(parts)
+
+    def _current_frames(self) -> Tuple[str, Dict[str, Any]]:
+        """
+        The processed frames and the log version they reflect, reloading
+        them if the log changed since the last request.
+        """
+        version = self._log_version()
+        with self.lock:
+            if version != self.version:
+                daily, progress, snapshots = load_and_process_data(self.log_file_path)
+                self.frames = {"daily": daily, "progress": progress, "snapshots": snapshots}
+                self.responses = OrderedDict()
+                self.version = version
+            return self.version, self.frames
+
+    @staticmethod
+    def _date_filter(df: pl.DataFrame, query: Dict[str, list], column: str = "fetch_date") -> pl.DataFrame:
+        """
+        Apply the optional start/end query parameters to a date column.
+        """
+        if df.is_empty():
+            return df
+        try:
+            start = date.fromisoformat(query["start"][0]) if "start" in query else None
+            end = date.fromisoformat(query["end"][0]) if "end" in query else None
+        except ValueError as e:
+            raise BadRequest(f"Invalid date: {e}.")
+
+        if start is not None:
+            df = df.filter(pl.col(column).cast(pl.Date) >= start)
+        if end is not None:
+            df = df.filter(pl.col(column).cast(pl.Date) <= end)
+        return df
+
+    @staticmethod
+    def _cache_key(endpoint: str, fmt: str, query: Dict[str, list]) -> Hashable:
+        """
+        What a response depends on: the endpoint, format and the parameters
+        it reads, so equivalent URLs share one cache entry.
+        """
+        return (
+            endpoint, fmt,
+            query.get("start", [None])[0], query.get("end", [None])[0],
+            tuple(sorted(set(query.get("category", [])))), tuple(sorted(set(query.get("level", [])))),
+        )
+
+    @staticmethod
+    def _encode(payload, fmt: str) -> Tuple[bytes, str]:
+        """
+        Serialise a frame (or a dict of frames) as JSON or Arrow IPC.
+        """
+        if fmt == "arrow":
+            if not isinstance(payload, pl.DataFrame):
+                raise BadRequest("Arrow output is only available for tabular endpoints.")
+            buffer = io.BytesIO()
+            payload.write_ipc(buffer)
+            return buffer.getvalue(), ARROW_CONTENT_TYPE
+
+        if isinstance(payload, pl.DataFrame):
+            return payload.write_json().encode("utf-8"), "application/json"
+        if isinstance(payload, dict):
+            body = {
+                key: json.loads(value.write_json()) if isinstance(value, pl.DataFrame) else value
+                for key, value in payload.items()
+            }
+            return json.dumps(body, default=str).encode("utf-8"), "application/json"
+        raise BadRequest("Unsupported payload.")
+
+    def _query(self, endpoint: str, query: Dict[str, list], frames: Dict[str, Any]):
+        """
+        The frame or dict answering an endpoint.
+        """
+        if endpoint == "daily":
+            return self._date_filter(frames["daily"], query)
+
+        if endpoint == "progress":
+            df = self._date_filter(frames["progress"], query)
+            for key in ("category", "level"):
+                if key in query and not df.is_empty():
+                    df = df.filter(pl.col(key).is_in(query[key]))
+            return df
+
+        if endpoint == "snapshot":
+            return frames["snapshots"]
+
+        if endpoint == "streaks":
+            return RenshuuRollups(self.log_file_path).streaks()
+
+        table = endpoint.split("/", 1)[1] if endpoint.startswith("rollups/") else None
+        if table in ROLLUP_TABLES:
+            df = RenshuuRollups(self.log_file_path).load(table)
+            period = {"weekly": "week", "monthly": "month"}.get(table, "fetch_date")
+            return self._date_filter(df, query, period)
+
+        raise NotFound(f"Unknown endpoint '/{endpoint}'.")
+
+    def _plot(self, name: str) -> Tuple[str, bytes, str]:
+        """
+        A rendered plot with an ETag derived from its size and mtime.
+        """
+        path = os.path.join(self.plots_dir, os.path.basename(name))
+        content_type = PLOT_CONTENT_TYPES.get(os.path.splitext(name)[1])
+        if content_type is None or not os.path.isfile(path):
+            raise NotFound(f"No plot named '{name}'.")
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        with open(path, 'rb') as f:
+            return etag, f.read(), content_type
+
+    def _response(self, url: str) -> Tuple[str, bytes, str]:
+        """
+        (ETag, body, content type) for a request URL, cached per log version
+        in a bounded least-recently-used cache.
+        """
+        parsed = urlparse(url)
+        endpoint = parsed.path.strip("/")
+        if endpoint.startswith("plots/"):
+            return self._plot(endpoint.split("/", 1)[1])
+
+        query = parse_qs(parsed.query)
+        fmt = query.pop("format", ["json"])[0]
+        if fmt not in ("json", "arrow"):
+            raise BadRequest(f"Unknown format '{fmt}'.")
+
+        if endpoint in ("snapshot", "latest"):
+            # Answered from the fetcher's latest-snapshot file, without loading the history.
+            latest = read_latest_snapshot(self.log_file_path)
+            if latest is not None:
+                payload = latest if endpoint == "latest" else RenshuuDataProcessor.snapshot_from_latest(latest)
+                body, content_type = self._encode(payload, fmt)
+                return '"' + hashlib.sha1(body).hexdigest() + '"', body, content_type
+            if endpoint == "latest":
+                raise NotFound("No up-to-date latest snapshot for this log.")
+
+        version, frames = self._current_frames()
+        key = self._cache_key(endpoint, fmt, query)
+        with self.lock:
+            cached = self.responses.get(key)
+            if cached is not None:
+                self.responses.move_to_end(key)
+                return cached
+
+        body, content_type = self._encode(self._query(endpoint, query, frames), fmt)
+        etag = '"' + hashlib.sha1(f"{version}|{key}".encode("utf-8") + body).hexdigest() + '"'
+        with self.lock:
+            # Don't cache an answer built from frames replaced meanwhile.
+            if self.version == version:
+                self.responses[key] = (etag, body, content_type)
+                while len(self.responses) > SERVER_RESPONSE_CACHE:
+                    self.responses.popitem(last=False)
+        return etag, body, content_type
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        headers = {}
+        try:
+            etag, body, content_type = self._response(handler.path)
+            headers["ETag"] = etag
+            headers["Cache-Control"] = "no-cache"
+            if etag in [tag.strip() for tag in handler.headers.get("If-None-Match", "").split(",")]:
+                status, body = 304, b""
+            else:
+                status = 200
+        except NotFound as e:
+            status, body, content_type = 404, json.dumps({"error": str(e)}).encode("utf-8"), "application/json"
+        except BadRequest as e:
+            status, body, content_type = 400, json.dumps({"error": str(e)}).encode("utf-8"), "application/json"
+        except Exception as e:
+            print(f"Error serving {handler.path}: {e}.")
+            status, body, content_type = 500, json.dumps({"error": "Internal error"}).encode("utf-8"), "application/json"
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        if status != 304:
+            handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self) -> "RenshuuQueryServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import hashlib
+import polars as pl
+from typing import Any
+
+# Digests live in a hidden folder next to the figures they describe.
+CACHE_DIR_NAME = ".render_cache"
+
+
+def _update_digest(digest, obj: Any) -> None:
+    """
+    Feed a plot input (frames, series, dicts, scalars) into a hash.
+    """
+    # Only consider pandas inputs if pandas was imported by the caller.
+    pd = sys.modules.get("pandas")
+
+    if isinstance(obj, (pl.DataFrame, pl.Series)):
+        frame = obj.to_frame() if isinstance(obj, pl.Series) else obj
+        digest.update(repr(frame.schema).encode())
+        digest.update(frame.hash_rows().to_numpy().tobytes())
+    elif pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        if isinstance(obj, pd.DataFrame):
+            digest.update(repr(list(obj.columns)).encode())
+            digest.update(repr(list(obj.dtypes)).encode())
+        else:
+            digest.update(repr((obj.name, obj.dtype)).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            digest.update(repr(key).encode())
+            _update_digest(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _update_digest(digest, item)
+    else:
+        digest.update(repr(obj).encode())
+
+
+def compute_digest(*inputs: Any) -> str:
+    """
+    Hash everything a figure is drawn from.
+    """
+    digest = hashlib.sha256()
+    for obj in inputs:
+        _update_digest(digest, obj)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Remembers the input digest of each rendered figure so unchanged figures
+    can be skipped.
+    """
+
+    def __init__(self, output_dir: str):
+        self.cache_dir = os.path.join(output_dir, CACHE_DIR_NAME)
+
+    def _manifest_path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, os.path.basename(filename) + ".json")
+
+    def is_fresh(self, filename: str, digest: str) -> bool:
+        """
+        True if `filename` exists and was rendered from inputs with `digest`.
+        """
+        if not os.path.exists(filename):
+            return False
+
+        try:
+            with open(self._manifest_path(filename), 'r', encoding='utf-8') as f:
+                return json.load(f).get("digest") == digest
+        except (IOError, json.JSONDecodeError):
+            return False
+
+    def record(self, filename: str, digest: str) -> None:
+        """
+        Store the digest `filename` was just rendered from.
+        """
+        manifest_path = self._manifest_path(filename)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump({"digest": digest}, f)
+            os.replace(manifest_path + ".tmp", manifest_path)
+        except IOError as e:
+            print(f"Warning: could not update render cache for {filename}: {e}.")
@@ -0,0 +1,242 @@
+import os
+import json
+import polars as pl
+from datetime import date, timedelta
+from typing import Dict, Any, Optional
+from src.instrumentation import instrument
+
+# Rollup tables live next to the log they summarise.
+ROLLUPS_SUFFIX = ".rollups"
+ROLLUPS_STATE_FILE = "_state.json"
+ROLLUP_TABLES = ("weekly", "monthly", "progress_deltas")
+
+DAILY_COLUMNS = ["daily_all", "daily_grammar", "daily_vocab", "daily_kanji", "daily_sent"]
+
+
+class RenshuuRollups:
+    """
+    Weekly and monthly activity totals, study streaks and day-over-day
+    progress deltas, persisted and updated incrementally from the daily and
+    progress metrics as new days arrive.
+
+    The last day seen may still change (its counters grow until midnight), so
+    its contribution is kept in the state and replaced on the next update.
+    """
+
+    def __init__(self, log_file_path: str, rollup_dir: str = None):
+        self.rollup_dir = rollup_dir or log_file_path + ROLLUPS_SUFFIX
+        self.state_path = os.path.join(self.rollup_dir, ROLLUPS_STATE_FILE)
+
+    def _table_path(self, name: str) -> str:
+        return os.path.join(self.rollup_dir, f"{name}.parquet")
+
+    def load(self, name: str) -> pl.DataFrame:
+        """
+        Read a rollup table ('weekly', 'monthly' or 'progress_deltas').
+        """
+        path = self._table_path(name)
+        return pl.read_parquet(path) if os.path.exists(path) else pl.DataFrame()
+
+    def _write(self, name: str, df: pl.DataFrame) -> None:
+        path = self._table_path(name)
+        df.write_parquet(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def _read_state(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            print(f"Ignoring unreadable rollup state: {e}.")
+            return None
+
+    def _write_state(self, state: Dict[str, Any]) -> None:
+        with open(self.state_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    def streaks(self) -> Dict[str, Any]:
+        """
+        Current and longest study streaks (consecutive days with activity).
+        The current streak is the one running on the latest logged day.
+        """
+        state = self._read_state()
+        if state is None:
+            return {}
+        return {key: value for key, value in state["streak"].items() if key != "previous_date"}
+
+    @staticmethod
+    def _period_rows(df_daily: pl.DataFrame, sign: int = 1) -> pl.DataFrame:
+        """
+        Daily rows as contributions to their week and month (negated with `sign=-1`).
+        """
+        return df_daily.select([
+            pl.col("fetch_date").dt.truncate("1w").cast(pl.Date).alias("week"),
+            pl.col("fetch_date").dt.truncate("1mo").cast(pl.Date).alias("month"),
+            *[(pl.col(col) * sign).alias(col) for col in DAILY_COLUMNS],
+            pl.lit(sign).alias("days"),
+            ((pl.col("daily_all") > 0).cast(pl.Int64) * sign).alias("active_days"),
+        ])
+
+    @staticmethod
+    def _merge_totals(existing: pl.DataFrame, rows: pl.DataFrame, period: str) -> pl.DataFrame:
+        """
+        Add per-day contributions into a period totals table.
+        """
+        columns = DAILY_COLUMNS + ["days", "active_days"]
+        rows = rows.select([pl.col(period), *[pl.col(col).cast(pl.Int64) for col in columns]])
+        if not existing.is_empty():
+            rows = pl.concat([existing.select([period, *columns]), rows])
+
+        totals = (
+            rows.group_by(period)
+            .agg([pl.col(col).sum() for col in columns])
+            .filter(pl.col("days") > 0)
+            .sort(period)
+        )
+        if period == "month":
+            totals = totals.with_columns([
+                (pl.col(col) / pl.col("days")).alias(col.replace("daily_", "avg_", 1))
+                for col in DAILY_COLUMNS
+            ])
+        return totals
+
+    @staticmethod
+    def _advance_streak(streak: Dict[str, Any], day: date, active: bool) -> Dict[str, Any]:
+        """
+        Streak state after one more logged day.
+        """
+        streak = dict(streak)
+        previous = streak["previous_date"]
+        consecutive = previous is not None and date.fromisoformat(previous) == day - timedelta(days=1)
+
+        if not active:
+            streak["current"], streak["current_start"] = 0, None
+        elif consecutive and streak["current"]:
+            streak["current"] += 1
+        else:
+            streak["current"], streak["current_start"] = 1, day.isoformat()
+
+        if streak["current"] > streak["longest"]:
+            streak["longest"] = streak["current"]
+            streak["longest_start"] = streak["current_start"]
+            streak["longest_end"] = day.isoformat()
+
+        streak["previous_date"] = day.isoformat()
+        return streak
+
+    @staticmethod
+    def _progress_deltas(df_progress: pl.DataFrame, previous: pl.DataFrame) -> pl.DataFrame:
+        """
+        Day-over-day change of each category/level, continuing from the
+        `previous` latest percentage of each.
+        """
+        keys = ["category", "level"]
+        rows = df_progress.select([
+            pl.col("fetch_date").cast(pl.Date), pl.col("category"), pl.col("level"),
+            pl.col("percentage").cast(pl.Float32),
+        ])
+        if not previous.is_empty():
+            previous = previous.select(rows.columns).cast(rows.schema)
+            rows = pl.concat([previous.with_columns(pl.lit(True).alias("seed")),
+                              rows.with_columns(pl.lit(False).alias("seed"))])
+        else:
+            rows = rows.with_columns(pl.lit(False).alias("seed"))
+
+        return (
+            rows.sort(["fetch_date", *keys])
+            .with_columns(pl.col("percentage").diff().over(keys).alias("delta"))
+            .filter(~pl.col("seed"))
+            .drop("seed")
+        )
+
+    @instrument()
+    def update(self, df_daily: pl.DataFrame, df_progress: pl.DataFrame) -> bool:
+        """
+        Fold the days since the last update into the rollups. Rebuilds them
+        from scratch if the history no longer matches what was rolled up.
+        Returns True if successful.
+        """
+        if df_daily.is_empty():
+            print("No daily activity data to roll up.")
+            return False
+
+        try:
+            state = self._read_state()
+            if state is not None:
+                last_date = date.fromisoformat(state["last_date"])
+                # The previously last day must still be there, and nothing may precede it unseen.
+                seen = df_daily.filter(pl.col("fetch_date").dt.date() < last_date).height
+                if seen != state["days_before_last"] or not df_daily.filter(
+                        pl.col("fetch_date").dt.date() == last_date).height:
+                    print("Daily history changed since the last rollup, rebuilding.")
+                    state = None
+
+            os.makedirs(self.rollup_dir, exist_ok=True)
+            if state is None:
+                for name in ROLLUP_TABLES:
+                    if os.path.exists(self._table_path(name)):
+                        os.remove(self._table_path(name))
+                last_date = None
+                weekly = monthly = deltas = pl.DataFrame()
+                streak = {"current": 0, "current_start": None, "longest": 0,
+                          "longest_start": None, "longest_end": None, "previous_date": None}
+            else:
+                weekly, monthly, deltas = (self.load(name) for name in ROLLUP_TABLES)
+                streak = state["streak_before_last"]
+
+            new_daily = df_daily.sort("fetch_date")
+            new_progress = df_progress
+            if last_date is not None:
+                new_daily = new_daily.filter(pl.col("fetch_date").dt.date() >= last_date)
+                new_progress = df_progress.filter(pl.col("fetch_date").dt.date() >= last_date)
+
+            # Replace the last day's earlier contribution with its current one.
+            contributions = self._period_rows(new_daily)
+            if state is not None:
+                previous_last = pl.DataFrame(state["last_row"]).with_columns(
+                    pl.col("fetch_date").str.strptime(pl.Datetime, "%Y-%m-%d")
+                )
+                contributions = pl.concat([self._period_rows(previous_last, sign=-1), contributions])
+            weekly = self._merge_totals(weekly, contributions, "week")
+            monthly = self._merge_totals(monthly, contributions, "month")
+
+            if not new_progress.is_empty():
+                if not deltas.is_empty():
+                    deltas = deltas.filter(pl.col("fetch_date") < last_date)
+                previous = deltas.sort("fetch_date").group_by(["category", "level"]).last() \
+                    if not deltas.is_empty() else pl.DataFrame()
+                new_deltas = self._progress_deltas(new_progress, previous)
+                deltas = pl.concat([deltas.cast(new_deltas.schema), new_deltas]) \
+                    if not deltas.is_empty() else new_deltas
+
+            rows = new_daily.select(["fetch_date", *DAILY_COLUMNS]).to_dicts()
+            for row in rows[:-1]:
+                streak = self._advance_streak(streak, row["fetch_date"].date(), row["daily_all"] > 0)
+            streak_before_last = streak
+            last = rows[-1]
+            streak = self._advance_streak(streak, last["fetch_date"].date(), last["daily_all"] > 0)
+
+            self._write("weekly", weekly)
+            self._write("monthly", monthly)
+            if not deltas.is_empty():
+                self._write("progress_deltas", deltas)
+
+            last_row = {col: [last[col]] for col in DAILY_COLUMNS}
+            last_row["fetch_date"] = [last["fetch_date"].date().isoformat()]
+            self._write_state({
+                "last_date": last["fetch_date"].date().isoformat(),
+                "days_before_last": df_daily.height - 1,
+                "last_row": last_row,
+                "streak_before_last": streak_before_last,
+                "streak": streak,
+            })
+
+            print(f"Rolled up {len(rows)} day(s) into '{self.rollup_dir}'.")
+            return True
+
+        except Exception as e:
+            print(f"Error updating rollups: {e}.")
+            return False
@@ -0,0 +1,265 @@
+import os
+import json
+import heapq
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from src.data_fetcher import RenshuuDataFetcher, RateLimiter, create_session
+from config.settings import (
+    REN_API_KEY, LOG_FILE, PLOTS_DIR, FETCH_MAX_WORKERS, FETCH_RATE_LIMIT,
+    SCHEDULER_INTERVAL, SCHEDULER_JITTER, SCHEDULER_ERROR_BACKOFF,
+    SCHEDULER_MAX_BACKOFF, SCHEDULER_HEARTBEAT, SCHEDULER_STATUS_FILE
+)
+
+
+def process_log(log_file: str, plots_dir: str) -> int:
+    """
+    Bring a log's processed data, rollups and figures up to date (runs in the
+    scheduler's processing thread). Returns the number of days processed.
+    """
+    # Imported here so the scheduler only loads Polars and Matplotlib once
+    # there is something to process.
+    from src.data_processor import load_and_process_data
+    from src.rollups import RenshuuRollups
+    from src.visualizer import RenshuuVisualizer, build_render_tasks
+
+    df_daily, df_progress, snapshots = load_and_process_data(log_file)
+    if df_daily.is_empty():
+        return 0
+
+    RenshuuRollups(log_file).update(df_daily, df_progress)
+    viz = RenshuuVisualizer(plots_dir, headless=True, use_cache=True)
+    for method_name, args in build_render_tasks(df_daily, df_progress, snapshots):
+        getattr(viz, method_name)(*args)
+    return df_daily.height
+
+
+def _log_signature(log_file: str) -> Optional[Tuple[int, int]]:
+    """
+    Size and modification time of a log, to tell whether a fetch appended to it.
+    """
+    try:
+        stat = os.stat(log_file)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+class RenshuuScheduler:
+    """
+    Resident fetcher: keeps one pool of keep-alive connections and a fetcher
+    per account, fetches each account on its own interval (with jitter, and
+    backing off after failures) on a small thread pool, so a slow account
+    does not delay the others, and hands logs that grew to a processing
+    thread that updates their data, rollups and figures. Its state is
+    written to a status file after every fetch and at least every heartbeat.
+    """
+
+    def __init__(self, accounts: List[Dict[str, Any]] = None, interval: float = None,
+                 jitter: float = None, dedup_mode: str = None, process: bool = True,
+                 status_file: str = None, base_url: str = None, rate_limit: float = None):
+        # Without an accounts file, fetch the .env account into the default log and plots.
+        if accounts is None:
+            accounts = [{"name": "default", "api_key": REN_API_KEY, "log_file": LOG_FILE,
+                         "plots_dir": PLOTS_DIR}]
+        self.accounts = {account["name"]: account for account in accounts}
+        self.interval = interval or SCHEDULER_INTERVAL
+        self.jitter = SCHEDULER_JITTER if jitter is None else jitter
+        self.process = process
+        self.status_file = status_file or SCHEDULER_STATUS_FILE
+
+        self.max_workers = min(len(accounts), FETCH_MAX_WORKERS)
+        session = create_session(pool_size=self.max_workers)
+        rate_limiter = RateLimiter(FETCH_RATE_LIMIT if rate_limit is None else rate_limit)
+        self.fetchers = {
+            account["name"]: RenshuuDataFetcher(api_key=account["api_key"], base_url=base_url,
+                                                session=session, rate_limiter=rate_limiter,
+                                                dedup_mode=dedup_mode)
+            for account in accounts
+        }
+
+        self.stop_event = threading.Event()
+        # Set when a fetch is scheduled, so the main loop re-checks what is due.
+        self.wakeup = threading.Event()
+        self.status_lock = threading.Lock()
+        self.started_at = datetime.now().isoformat()
+        self.status = {
+            name: {"fetches": 0, "failures": 0, "consecutive_failures": 0, "last_success": None,
+                   "last_error": None, "next_fetch": None, "last_processed": None, "process_error": None}
+            for name in self.accounts
+        }
+        self.schedule: List[Tuple[float, str]] = []
+        self.pending = queue.Queue()
+        self.queued = set()
+
+    def _interval(self, name: str) -> float:
+        return float(self.accounts[name].get("interval") or self.interval)
+
+    def _schedule(self, name: str, delay: float) -> None:
+        """
+        Queue the next fetch of an account `delay` seconds from now, plus jitter.
+        """
+        due = datetime.now().timestamp() + delay + random.uniform(0, self.jitter)
+        with self.status_lock:
+            heapq.heappush(self.schedule, (due, name))
+            self.status[name]["next_fetch"] = datetime.fromtimestamp(due).isoformat()
+        self.wakeup.set()
+
+    def _first_delay(self, name: str) -> float:
+        """
+        Wait out the rest of the interval since the log was last written, so
+        restarting the scheduler does not fetch everything again.
+        """
+        try:
+            elapsed = datetime.now().timestamp() - os.path.getmtime(self.accounts[name]["log_file"])
+        except OSError:
+            return 0.0
+        return max(0.0, self._interval(name) - elapsed)
+
+    def _backoff(self, failures: int, name: str) -> float:
+        """
+        Delay before retrying an account after `failures` failed fetches in a row.
+        """
+        return min(SCHEDULER_ERROR_BACKOFF * 2 ** (failures - 1), SCHEDULER_MAX_BACKOFF, self._interval(name))
+
+    def fetch(self, name: str) -> bool:
+        """
+        Fetch and log one account, then schedule its next fetch.
+        Returns True if successful; errors are recorded, never raised.
+        """
+        account, fetcher = self.accounts[name], self.fetchers[name]
+        before = _log_signature(account["log_file"])
+
+        error = None
+        try:
+            data = fetcher.fetch_profile()
+            success = bool(data) and fetcher.save_to_log(data, account["log_file"])
+        except Exception as e:
+            # An unexpected error must not kill the daemon: back off like any failure.
+            success, error = False, f"{type(e).__name__}: {e}"
+
+        with self.status_lock:
+            status = self.status[name]
+            status["fetches"] += 1
+            if success:
+                status["consecutive_failures"] = 0
+                status["last_success"] = datetime.now().isoformat()
+            else:
+                status["failures"] += 1
+                status["consecutive_failures"] += 1
+                status["last_error"] = error or fetcher.last_error or "Failed to write log file."
+            failures = status["consecutive_failures"]
+
+        if success:
+            self._schedule(name, self._interval(name))
+            if self.process and _log_signature(account["log_file"]) != before:
+                self._queue_processing(name)
+        else:
+            delay = self._backoff(failures, name)
+            print(f"Fetch for '{name}' failed ({failures} in a row), retrying in {delay:.0f}s.")
+            self._schedule(name, delay)
+        return success
+
+    def _queue_processing(self, name: str) -> None:
+        """
+        Queue an account for processing, once however many fetches arrive meanwhile.
+        """
+        with self.status_lock:
+            if name in self.queued:
+                return
+            self.queued.add(name)
+        self.pending.put(name)
+
+    def _process_worker(self) -> None:
+        """
+        Process queued accounts one at a time until stopped.
+        """
+        while True:
+            name = self.pending.get()
+            if name is None:
+                return
+            with self.status_lock:
+                self.queued.discard(name)
+
+            account = self.accounts[name]
+            plots_dir = account.get("plots_dir") or os.path.join(PLOTS_DIR, name)
+            try:
+                days = process_log(account["log_file"], plots_dir)
+                with self.status_lock:
+                    self.status[name]["last_processed"] = datetime.now().isoformat()
+                    self.status[name]["process_error"] = None
+                print(f"Processed '{name}': {days} days.")
+            except Exception as e:
+                with self.status_lock:
+                    self.status[name]["process_error"] = str(e)
+                print(f"Error processing '{name}': {e}.")
+            self.write_status()
+
+    def write_status(self, state: str = "running") -> None:
+        """
+        Write the scheduler's health and per-account state to the status file.
+        """
+        with self.status_lock:
+            data = {
+                "state": state,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "updated_at": datetime.now().isoformat(),
+                "processing_queue": sorted(self.queued),
+                "accounts": {name: dict(status) for name, status in self.status.items()},
+            }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.status_file)), exist_ok=True)
+            with open(self.status_file + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(self.status_file + ".tmp", self.status_file)
+        except IOError as e:
+            print(f"Warning: could not write scheduler status: {e}.")
+
+    def run(self) -> None:
+        """
+        Fetch on schedule until stop() is called.
+        """
+        for name in self.accounts:
+            self._schedule(name, self._first_delay(name))
+
+        worker = None
+        if self.process:
+            worker = threading.Thread(target=self._process_worker, name="renshuu-process", daemon=True)
+            worker.start()
+
+        # An account is back in the schedule only once its fetch is done, so
+        # it never runs twice at once.
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="renshuu-fetch")
+        try:
+            while not self.stop_event.is_set():
+                self.write_status()
+                self.wakeup.clear()
+                with self.status_lock:
+                    due, name = self.schedule[0] if self.schedule else (None, None)
+                    wait = SCHEDULER_HEARTBEAT if due is None else due - datetime.now().timestamp()
+                    if wait <= 0:
+                        heapq.heappop(self.schedule)
+                if wait > 0:
+                    self.wakeup.wait(min(wait, SCHEDULER_HEARTBEAT))
+                    continue
+                pool.submit(self.fetch, name)
+        finally:
+            # Let the fetches in progress finish.
+            pool.shutdown(wait=True)
+            if worker is not None:
+                # Let the processing in progress finish, but drop the rest.
+                while not self.pending.empty():
+                    self.pending.get_nowait()
+                with self.status_lock:
+                    self.queued.clear()
+                self.pending.put(None)
+                worker.join()
+            self.write_status("stopped")
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.wakeup.set()
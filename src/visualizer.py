@@ -1,101 +1,261 @@
 import os 
 import numpy as np 
-import pandas as pd 
 import polars as pl
 import matplotlib.pyplot as plt 
-import calplot 
 from typing import Optional, List 
-from config.settings import CATEGORIES, LEVELS, METRICS, PLOTS_DIR, PLOT_STYLE 
+from config.settings import (
+    CATEGORIES, LEVELS, METRICS, PLOTS_DIR, PLOT_STYLE, 
+    PROGRESS_MAX_POINTS, PROGRESS_DOWNSAMPLING, HEATMAP_RENDERER,
+    RENDER_PROFILES, RENDER_PROFILE
+)
+from src.calendar_heatmap import calendar_heatmap
+from src.downsampling import downsample
+from src.instrumentation import instrument, current_stage
+from src.render_cache import RenderCache, compute_digest
+
+# In rasterized vector output, lines with more points than this become images.
+RASTERIZE_MIN_POINTS = 200
+
+
+def optimize_png(filename: str, colors: Optional[int] = None) -> None:
+    """
+    Recompress a saved PNG losslessly, or as a palette of `colors` colours.
+    Leaves the file as it is if Pillow is not installed.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        print("PNG optimisation needs the Pillow package, skipping it.")
+        return
+
+    with Image.open(filename) as image:
+        image.load()
+    if colors:
+        image = image.convert("RGB").quantize(colors=colors, method=Image.Quantize.FASTOCTREE)
+    image.save(filename, optimize=True)
+
+
+def rasterize_dense_layers(fig) -> None:
+    """
+    Mark heatmap cells, images and long lines to be embedded as images in
+    vector output, keeping text and axes as vectors.
+    """
+    for ax in fig.axes:
+        for artist in ax.collections + ax.images:
+            artist.set_rasterized(True)
+        for line in ax.lines:
+            if len(line.get_xdata()) > RASTERIZE_MIN_POINTS:
+                line.set_rasterized(True)
+
 
 class RenshuuVisualizer: 
     """
     Handles visualisation of Renshuu study data.
     """
 
-    def __init__(self, output_dir: str = None):
+    def __init__(self, output_dir: str = None, headless: bool = False, use_cache: bool = False,
+                 profile: str = None):
         self.output_dir = output_dir or PLOTS_DIR 
+        self.headless = headless
+        self.profile_name = profile or RENDER_PROFILE
+        if self.profile_name not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile '{self.profile_name}', "
+                             f"expected one of {list(RENDER_PROFILES)}.")
+        self.profile = RENDER_PROFILES[self.profile_name]
+        self.render_cache = RenderCache(self.output_dir) if use_cache else None
         os.makedirs(self.output_dir, exist_ok=True)
 
+        if headless:
+            # Render off-screen; nothing is ever shown.
+            plt.switch_backend("Agg")
+
+    def _finish(self, fig) -> None:
+        """
+        Show the figure unless running headless, then release it.
+        """
+        if not self.headless:
+            plt.show()
+        plt.close(fig)
+
+    def _input_digest(self, save: bool, *inputs) -> Optional[str]:
+        """
+        Digest of a figure's inputs and plot style, if the render cache applies.
+        """
+        if not (save and self.render_cache):
+            return None
+        return compute_digest(*inputs, PLOT_STYLE, self.profile)
+
+    def _filename(self, name: str) -> str:
+        """
+        Path of a figure in the output format of the render profile.
+        """
+        return os.path.join(self.output_dir, f"{name}.{self.profile['format']}")
+
+    def _layout(self, fig) -> None:
+        """
+        Fit subplots and labels to the figure, unless the profile skips it.
+        """
+        if self.profile.get('layout', True):
+            fig.tight_layout()
+
+    def _save(self, fig, filename: str) -> None:
+        """
+        Save a figure as the render profile says.
+        """
+        if self.profile.get('rasterize') and self.profile['format'] != 'png':
+            rasterize_dense_layers(fig)
+        fig.savefig(filename, dpi=self.profile['dpi'], format=self.profile['format'],
+                    bbox_inches="tight" if self.profile.get('tight') else None)
+        if self.profile.get('optimize') and self.profile['format'] == 'png':
+            optimize_png(filename, self.profile.get('colors'))
+
+    def _is_fresh(self, filename: str, digest: Optional[str]) -> bool:
+        """
+        True if `filename` was already rendered from the same inputs.
+        """
+        if digest is None or not self.render_cache.is_fresh(filename, digest):
+            return False
+        print(f"Skipping {filename}: inputs unchanged.")
+        return True
 
-    def plot_activity_heatmap(self, data_series: pd.Series, title: str, 
+    def _record(self, filename: str, digest: Optional[str]) -> None:
+        """
+        Account for a saved figure and remember the digest it was drawn from.
+        """
+        current_stage().bytes_written += os.path.getsize(filename)
+        if digest is not None:
+            self.render_cache.record(filename, digest)
+
+    @instrument()
+    def plot_activity_heatmap(self, df_metric: pl.DataFrame, title: str, 
                               metric_filename: str, save: bool = True) -> None:
         """
         Generate calendar heatmap for study activity.
+        `df_metric` holds 'fetch_date' and a single metric column.
         """
-        if data_series.empty: 
+        if df_metric.is_empty(): 
             print(f"Cannot plot '{title}': Data series is empty.")
             return 
-                        
-        fig, ax = calplot.calplot(
-            data_series, 
-            cmap=PLOT_STYLE['cmap'],
-            colorbar=False, 
-            yearlabel_kws={'fontname': 'sans-serif'},
-            suptitle=f"Renshuu Daily {title} Heatmap"
-        )
 
-        plt.tight_layout()
+        filename = self._filename(f"renshuu_daily_{metric_filename}_heatmap")
+        current_stage().rows = df_metric.height
+        digest = self._input_digest(save, df_metric, title, HEATMAP_RENDERER)
+        if self._is_fresh(filename, digest):
+            return
 
-        if save:
-            filename = os.path.join(
-                self.output_dir, 
-                f"renshuu_daily_{metric_filename}_heatmap.png"
+        metric_col = [col for col in df_metric.columns if col != "fetch_date"][0]
+
+        if HEATMAP_RENDERER == 'native':
+            fig, ax = calendar_heatmap(
+                df_metric["fetch_date"].to_numpy(),
+                df_metric[metric_col].to_numpy(),
+                cmap=PLOT_STYLE['cmap'],
+                yearlabel_kws={'fontname': 'sans-serif'},
+                suptitle=f"Renshuu Daily {title} Heatmap"
+            )
+        else:
+            # calplot needs a pandas Series indexed by date; build only that one.
+            import pandas as pd 
+            import calplot 
+
+            data_series = pd.Series(
+                df_metric[metric_col].to_numpy(),
+                index=pd.DatetimeIndex(df_metric["fetch_date"].to_numpy()),
+                name=metric_col
             )
-            fig.savefig(filename, dpi=PLOT_STYLE['dpi'], bbox_inches="tight")
+                            
+            fig, ax = calplot.calplot(
+                data_series, 
+                cmap=PLOT_STYLE['cmap'],
+                colorbar=False, 
+                yearlabel_kws={'fontname': 'sans-serif'},
+                suptitle=f"Renshuu Daily {title} Heatmap"
+            )
+
+        self._layout(fig)
+
+        if save:
+            self._save(fig, filename)
+            self._record(filename, digest)
             print(f"Heatmpap saved to {filename}.")
 
-            plt.show()
-            plt.close(fig) 
+        self._finish(fig)
 
-    def plot_all_activity_heatmaps(self, df_daily_metrics: pd.DataFrame) -> None: 
+    def plot_all_activity_heatmaps(self, df_daily_metrics: pl.DataFrame) -> None: 
         """
         Generate heatmaps for all activity metrics.
         """
-        if df_daily_metrics.empty: 
+        if df_daily_metrics.is_empty(): 
             print(f"No daily metrics data available for plotting.")
             return 
         
         for metric_col, title in METRICS.items():
             if metric_col in df_daily_metrics.columns: 
                 self.plot_activity_heatmap(
-                    df_daily_metrics[metric_col],
+                    df_daily_metrics.select(["fetch_date", metric_col]),
                     title, 
                     metric_col.replace('daily_', '')
                 )
 
-    def plot_progress_over_time_multi_panel(self, df_progress_long: pd.DataFrame, 
+    @instrument()
+    def plot_progress_over_time_multi_panel(self, df_progress_long: pl.DataFrame, 
                                   levels_to_plot: List[str] = None, 
-                                  save: bool = True
+                                  save: bool = True,
+                                  max_points: Optional[int] = PROGRESS_MAX_POINTS
                                   ) -> None:
         """
         Generate multi-panel line charts showing the time evolution of progress 
         for each category and level.
+        Lines longer than `max_points` are downsampled, keeping their shape.
         """
         levels_to_plot = levels_to_plot or LEVELS 
 
-        if df_progress_long.empty: 
+        if df_progress_long.is_empty(): 
             print("No progress data available.")
             return 
+
+        filename = self._filename("renshuu_progress_over_time")
+        current_stage().rows = df_progress_long.height
+        digest = self._input_digest(save, df_progress_long, levels_to_plot, 
+                                    max_points, PROGRESS_DOWNSAMPLING)
+        if self._is_fresh(filename, digest):
+            return
         
+        # Partition once into one contiguous, date-ordered frame per line.
+        lines = (
+            df_progress_long
+            .select(["category", "level", "fetch_date", "percentage"])
+            .sort("fetch_date")
+            .partition_by(["category", "level"], as_dict=True)
+        )
+        categories_present = {category for category, _ in lines}
+
         # Create subplots, one per category 
-        n_categories = len(CATEGORIES)
-        fix, axes = plt.subplots(2, 2, figsize=(15, 10))
+        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
         axes = axes.flatten() 
 
         for i, (category, category_label) in enumerate(CATEGORIES.items()):
-            category_data = df_progress_long[df_progress_long['category'] == category]
-
-            if category_data.empty:
+            if category not in categories_present:
                 axes[i].text(0.5, 0.5, f"No {category_label} data",
                              ha='center', va='center', transform=axes[i].transAxes)
                 continue
 
             # Plot each level as a separate line 
             for level in levels_to_plot:
-                level_data = category_data[category_data['level'] == level]
-                if not level_data.empty:
-                    axes[i].plot(level_data['fetch_date'], level_data['percentage'],
-                                 marker='o', label=level.upper(), linewidth=2, markersize=4)
+                level_data = lines.get((category, level))
+                if level_data is None:
+                    continue
+
+                dates, values = downsample(
+                    level_data['fetch_date'].to_numpy(), 
+                    level_data['percentage'].to_numpy(),
+                    max_points, 
+                    PROGRESS_DOWNSAMPLING
+                )
+                # Markers only help while individual days are distinguishable.
+                marker = 'o' if len(dates) == len(level_data) else None
+                axes[i].plot(dates, values,
+                             marker=marker, label=level.upper(), linewidth=2, markersize=4)
                     
             axes[i].set_title(f"{category_label} Progress", fontweight='bold')
             axes[i].set_ylabel("Progress %")
@@ -107,16 +267,16 @@ class RenshuuVisualizer:
             axes[i].tick_params(axis='x', rotation=45)
 
         plt.suptitle("Learning Progress Over Time Across All Categories", fontsize=16, y=0.98)
-        plt.tight_layout()
+        self._layout(fig)
 
         if save: 
-            filename = os.path.join(self.output_dir, "renshuu_progress_over_time.png")
-            plt.savefig(filename, bbox_inches='tight', dpi=PLOT_STYLE['dpi'])
+            self._save(fig, filename)
+            self._record(filename, digest)
             print(f"Multi-panel chart saved to {filename}.")
         
-        plt.show()
-        plt.close()
+        self._finish(fig)
 
+    @instrument()
     def plot_current_progress_bars(self, snapshots: dict, 
                                    levels_to_plot: List[str] = None,
                                    save: bool = True
@@ -126,9 +286,15 @@ class RenshuuVisualizer:
         """
         levels_to_plot = levels_to_plot or LEVELS 
 
-        if not snapshots or all(df.empty for df in snapshots.values()):
+        if not snapshots or all(df.is_empty() for df in snapshots.values()):
             print("No progress snapshot available.")
             return 
+
+        filename = self._filename("renshuu_progress_bars")
+        current_stage().rows = sum(df.height for df in snapshots.values())
+        digest = self._input_digest(save, snapshots, levels_to_plot)
+        if self._is_fresh(filename, digest):
+            return
         
         fig, ax = plt.subplots(figsize=(12, 8))
 
@@ -138,7 +304,7 @@ class RenshuuVisualizer:
 
         for i, (category, category_label) in enumerate(CATEGORIES.items()):
             df_cat = snapshots[category]
-            values = [df_cat[level].iloc[0] if level in df_cat.columns else 0 for level in levels_to_plot] 
+            values = [df_cat[level][0] if level in df_cat.columns else 0 for level in levels_to_plot] 
 
             ax.barh(y_pos + i * bar_width, values, bar_width, 
                     label=category_label, color=colors[i % len(colors)], alpha=0.8)
@@ -158,12 +324,41 @@ class RenshuuVisualizer:
         ax.set_xlim(0, 100)
         ax.grid(axis='x', alpha=0.3)
 
-        plt.tight_layout()
+        self._layout(fig)
 
         if save: 
-            filename = os.path.join(self.output_dir, "renshuu_progress_bars.png")
-            plt.savefig(filename, bbox_inches='tight', dpi=PLOT_STYLE['dpi'])
+            self._save(fig, filename)
+            self._record(filename, digest)
             print(f"Current progress chart saved to {filename}.")
 
-        plt.show()
-        plt.close()
+        self._finish(fig)
+
+
+def build_render_tasks(df_daily: pl.DataFrame, df_progress: pl.DataFrame, snapshots: dict) -> list:
+    """
+    List the independent figures to render as (method name, args) pairs.
+    """
+    tasks = []
+
+    # Activity heatmaps.
+    if not df_daily.is_empty():
+        for metric_col, title in METRICS.items():
+            if metric_col in df_daily.columns:
+                tasks.append(("plot_activity_heatmap", 
+                              (df_daily.select(["fetch_date", metric_col]), title, metric_col.replace('daily_', ''))))
+    else:
+        print("No daily activity data available.")
+
+    # Progress bars.
+    if snapshots and not all(df.is_empty() for df in snapshots.values()):
+        tasks.append(("plot_current_progress_bars", (snapshots,)))
+    else:
+        print("No progress snapshot available.")
+
+    # Progress time evolution.
+    if not df_progress.is_empty():
+        tasks.append(("plot_progress_over_time_multi_panel", (df_progress,)))
+    else:
+        print("No progress data available.")
+
+    return tasks